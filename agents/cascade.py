@@ -0,0 +1,200 @@
+"""
+Model cascade: the small model is tried first, the default model only when its answer cannot be trusted.
+
+The small model (e.g. qwen3:0.6b, see AGENTONTOLOGY_SMALL_MODEL) chooses among the candidate formats of a file
+in a single call and reports its confidence. The answer is kept if it is not empty, every id is a known,
+non-obsolete EDAM format, and the confidence reaches AGENTONTOLOGY_CASCADE_MIN_CONFIDENCE. Otherwise the
+file is escalated to the default model, in the mode of the pipeline.
+"""
+import json
+import os
+import threading
+import litellm
+from agents.direct_classifier import CLASSIFIER_MAX_TOKENS, completion_kwargs
+from agents.query_ontology_db import small_model_config, small_model_sessions
+from tools.format_resolver import invalid_format_ids
+
+CASCADE_SYSTEM_PROMPT = (
+    "You are an expert in bioinformatics file formats. You are given a file of an nf-core module, "
+    "with its name, glob pattern and description, and a list of candidate EDAM formats. "
+    "Choose the candidate formats the file can have, best match first. Only use ids from the candidate list, "
+    "and answer with an empty list if none of them fits. "
+    "Also give your confidence that the answer is right, between 0 and 1. "
+    'Answer in JSON, as {"formats": ["format_XXXX", ...], "confidence": 0.0}.'
+)
+
+# Answers of the small model below this self-reported confidence are escalated
+MIN_CONFIDENCE = float(os.environ.get("AGENTONTOLOGY_CASCADE_MIN_CONFIDENCE", "0.7"))
+
+
+def cascade_available() -> bool:
+    """
+    Return whether a small model is configured.
+
+    Returns:
+        bool: True if the files with candidates are first sent to the small model.
+    """
+    return small_model_config is not None
+
+
+def cascade_schema(candidate_ids: list[str]) -> dict:
+    """
+    Build the JSON schema of an answer of the small model: formats among the candidates and a confidence.
+
+    Args:
+        candidate_ids (list): The candidate format ids.
+
+    Returns:
+        dict: The JSON schema.
+    """
+    return {
+        "type": "object",
+        "properties": {
+            "formats": {"type": "array", "items": {"type": "string", "enum": candidate_ids}},
+            "confidence": {"type": "number", "minimum": 0, "maximum": 1},
+        },
+        "required": ["formats", "confidence"],
+    }
+
+
+def check_answer(content: str, candidate_ids: list[str]) -> tuple[list[str], str]:
+    """
+    Validate an answer of the small model.
+
+    Backends that ignore the JSON schema may answer anything, so the ids are checked against the EDAM
+    term table and the candidates, not only parsed.
+
+    Args:
+        content (str): The model answer.
+        candidate_ids (list): The candidate format ids listed in the prompt.
+
+    Returns:
+        tuple: The format ids, and None if the answer can be kept, or the reason to escalate the file.
+    """
+    try:
+        answer = json.loads(content)
+    except (TypeError, ValueError):
+        return [], "the answer is not valid JSON"
+    if not isinstance(answer, dict) or not isinstance(answer.get("formats"), list):
+        return [], "the answer has no list of formats"
+    if not all(isinstance(term_id, str) for term_id in answer["formats"]):
+        return [], "the list of formats holds something else than ids"
+    formats = list(dict.fromkeys(answer["formats"]))
+    if not formats:
+        return [], "no format was chosen"
+    invalid = invalid_format_ids(formats)
+    if invalid:
+        return formats, f"unknown, obsolete or non-format ids: {', '.join(map(str, invalid))}"
+    outside = [term_id for term_id in formats if term_id not in candidate_ids]
+    if outside:
+        return formats, f"ids outside the candidates: {', '.join(outside)}"
+    confidence = answer.get("confidence")
+    # bool is an int, but true is not a confidence
+    if isinstance(confidence, bool) or not isinstance(confidence, (int, float)) or confidence < MIN_CONFIDENCE:
+        return formats, f"confidence {confidence} below {MIN_CONFIDENCE}"
+    return formats, None
+
+
+async def classify_small_async(prompt: str, candidate_ids: list[str]) -> tuple[list[str], str]:
+    """
+    Ask the small model for the formats of a file, in a single call.
+
+    Args:
+        prompt (str): The prompt of the file, see `build_classification_prompt`.
+        candidate_ids (list): The candidate format ids listed in the prompt.
+
+    Returns:
+        tuple: The format ids, and None if they can be kept, or the reason to escalate the file.
+    """
+    try:
+        response = await litellm.acompletion(
+            **completion_kwargs(small_model_config, small_model_sessions),
+            messages=[
+                {"role": "system", "content": CASCADE_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.0,
+            max_tokens=CLASSIFIER_MAX_TOKENS,
+            response_format={
+                "type": "json_schema",
+                "json_schema": {"name": "edam_formats", "schema": cascade_schema(candidate_ids)},
+            },
+        )
+    except Exception as e:
+        # The default model can still answer
+        return [], f"the small model failed: {e}"
+    return check_answer(response.choices[0].message.content, candidate_ids)
+
+
+class CascadeStats:
+    """
+    Files resolved on each tier of the pipeline, and time spent on the model tiers.
+
+    The tiers are "index" (resolved from the EDAM index), "cache" (answer cache), "small" (the small model
+    of the cascade) and "default" (the default model, agent or single call). The instance can be shared between threads.
+    """
+
+    TIERS = ("index", "cache", "small", "default")
+
+    def __init__(self):
+        self.files = dict.fromkeys(self.TIERS, 0)
+        self.seconds = dict.fromkeys(self.TIERS, 0.0)
+        # Time spent in small model calls whose answer was escalated
+        self.escalated = 0
+        self.escalated_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, tier: str, seconds: float = 0.0):
+        """
+        Record a file resolved on a tier.
+
+        Args:
+            tier (str): One of TIERS.
+            seconds (float): The time the tier took for the file.
+        """
+        with self._lock:
+            self.files[tier] += 1
+            self.seconds[tier] += seconds
+
+    def record_escalation(self, seconds: float):
+        """
+        Record a file escalated from the small model to the default model.
+
+        Args:
+            seconds (float): The time lost in the small model call.
+        """
+        with self._lock:
+            self.escalated += 1
+            self.escalated_seconds += seconds
+
+    def latency_saved(self) -> float:
+        """
+        Estimate the time saved by the small model: the files it resolved at the mean latency of the default model,
+        minus the time spent in all the small model calls.
+
+        Returns:
+            float: The seconds saved, or None while no file went to the default model to compare with.
+        """
+        with self._lock:
+            if not self.files["default"]:
+                return None
+            mean_default = self.seconds["default"] / self.files["default"]
+            return self.files["small"] * mean_default - self.seconds["small"] - self.escalated_seconds
+
+    def stats(self) -> dict:
+        """
+        Return the statistics.
+
+        Returns:
+            dict: The number and fraction of files resolved on each tier, the files escalated and the seconds saved.
+        """
+        saved = self.latency_saved()
+        with self._lock:
+            total = sum(self.files.values())
+            stats = {
+                tier: {"files": self.files[tier], "fraction": round(self.files[tier] / total, 3) if total else 0.0}
+                for tier in self.TIERS
+            }
+            stats["escalated"] = self.escalated
+        stats["latency_saved_seconds"] = None if saved is None else round(saved, 1)
+        return stats
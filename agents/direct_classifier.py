@@ -0,0 +1,276 @@
+"""
+Single-shot classification of nf-core module files into EDAM formats.
+
+Instead of letting the agent search the ontology over several steps, the candidate formats are retrieved
+from the local EDAM index beforehand and listed in a single prompt. The model answers in one call, with
+its output constrained by a JSON schema to the candidate ids (Ollama structured outputs).
+
+The instructions are in a constant system prompt and the file details come last, so that the server can
+reuse the evaluated prefix from one request to the next.
+"""
+import json
+import litellm
+from tools.fetch_ontology_tools import get_edam_terms
+from tools.module_meta import FileElement
+from agents.model_factory import ModelConfig, ModelSessions
+from agents.query_ontology_db import model_config, model_sessions
+
+CLASSIFIER_SYSTEM_PROMPT = (
+    "You are an expert in bioinformatics file formats. You are given a file of an nf-core module, "
+    "with its name, glob pattern and description, and a list of candidate EDAM formats. "
+    "Choose the candidate formats the file can have, best match first. Only use ids from the candidate list, "
+    "and answer with an empty list if none of them fits. "
+    'Answer in JSON, as {"formats": ["format_XXXX", ...]}.'
+)
+
+# Answers are a few ids, the output is cut well before the agent limit
+CLASSIFIER_MAX_TOKENS = 256
+
+# Length of the candidate definitions shown to the model
+_DEFINITION_LENGTH = 200
+
+
+def completion_kwargs(config: ModelConfig = None, sessions: ModelSessions = None) -> dict:
+    """
+    Return the model, endpoint and options of an asynchronous call, sent through the keep-alive session of the running event loop.
+
+    Args:
+        config (ModelConfig): The model. Defaults to the default model.
+        sessions (ModelSessions): The HTTP sessions to its backend.
+
+    Returns:
+        dict: Keyword arguments for `litellm.acompletion`.
+    """
+    if config is None:
+        config, sessions = model_config, model_sessions
+    return {
+        "model": config.model_id,
+        "api_base": config.api_base,
+        "api_key": config.api_key,
+        "client": sessions.async_client(),
+        **config.completion_options(),
+    }
+
+
+def candidate_schema(candidate_ids: list[str]) -> dict:
+    """
+    Build the JSON schema of an answer, restricting the formats to the candidates.
+
+    Args:
+        candidate_ids (list): The candidate format ids.
+
+    Returns:
+        dict: The JSON schema.
+    """
+    return {
+        "type": "object",
+        "properties": {
+            "formats": {"type": "array", "items": {"type": "string", "enum": candidate_ids}},
+        },
+        "required": ["formats"],
+    }
+
+
+def describe_candidates(candidate_ids: list[str]) -> str:
+    """
+    List candidate formats for a prompt, one per line with their label and the start of their definition.
+
+    Args:
+        candidate_ids (list): The candidate format ids.
+
+    Returns:
+        str: The candidate list.
+    """
+    terms = get_edam_terms() or {}
+    lines = []
+    for term_id in candidate_ids:
+        term = terms.get(term_id)
+        if term is None:
+            lines.append(f"- {term_id}")
+            continue
+        definition = term.definition[:_DEFINITION_LENGTH]
+        lines.append(f"- {term_id}: {term.label}" + (f" ({definition})" if definition else ""))
+    return "\n".join(lines)
+
+
+def describe_file(element: FileElement) -> str:
+    """
+    Describe a file element for a prompt.
+
+    Args:
+        element (FileElement): The file to classify.
+
+    Returns:
+        str: The file name, output channel, pattern and description, one per line.
+    """
+    lines = [f"{element.direction.capitalize()} file: {element.name}"]
+    if element.direction == "output":
+        lines.append(f"Output channel: {element.channel}")
+    if element.attributes.get("pattern"):
+        lines.append(f"Pattern: {element.attributes['pattern']}")
+    lines.append(f"Description: {str(element.description).strip()}")
+    return "\n".join(lines)
+
+
+def build_classification_prompt(element: FileElement, candidate_ids: list[str]) -> str:
+    """
+    Build the single-shot prompt of a file.
+
+    Args:
+        element (FileElement): The file to classify.
+        candidate_ids (list): The candidate format ids, see `find_candidate_formats`.
+
+    Returns:
+        str: The user message, sent after CLASSIFIER_SYSTEM_PROMPT.
+    """
+    return f"{describe_file(element)}\n\nCandidate formats:\n{describe_candidates(candidate_ids)}"
+
+
+def _keep_candidates(formats, candidate_ids: list[str]) -> list[str]:
+    """The format ids of an answer that are candidates, without duplicates."""
+    if not isinstance(formats, list):
+        return []
+    allowed = set(candidate_ids)
+    return list(dict.fromkeys(term_id for term_id in formats if isinstance(term_id, str) and term_id in allowed))
+
+
+def parse_formats(content: str, candidate_ids: list[str]) -> list[str]:
+    """
+    Read the formats of a JSON answer, keeping only the candidates.
+
+    Args:
+        content (str): The model answer.
+        candidate_ids (list): The candidate format ids.
+
+    Returns:
+        list: The chosen format ids, without duplicates, or an empty list if the answer is not valid JSON.
+    """
+    try:
+        answer = json.loads(content)
+    except (TypeError, ValueError):
+        return []
+    return _keep_candidates(answer.get("formats") if isinstance(answer, dict) else None, candidate_ids)
+
+
+async def classify_file_async(prompt: str, candidate_ids: list[str]) -> list[str]:
+    """
+    Ask the model for the formats of a file, in a single call.
+
+    Args:
+        prompt (str): The prompt of the file, see `build_classification_prompt`.
+        candidate_ids (list): The candidate format ids listed in the prompt.
+
+    Returns:
+        list: The chosen format ids, best match first.
+    """
+    response = await litellm.acompletion(
+        **completion_kwargs(),
+        messages=[
+            {"role": "system", "content": CLASSIFIER_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt},
+        ],
+        temperature=0.0,
+        max_tokens=CLASSIFIER_MAX_TOKENS,
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "edam_formats", "schema": candidate_schema(candidate_ids)},
+        },
+    )
+    return parse_formats(response.choices[0].message.content, candidate_ids)
+
+
+BATCH_SYSTEM_PROMPT = (
+    "You are an expert in bioinformatics file formats. You are given the files of an nf-core module, "
+    "each with its name, glob pattern and description, and its own list of candidate EDAM formats. "
+    "For each file, choose the candidate formats the file can have, best match first. Only use ids from the "
+    "candidate list of that file, and answer with an empty list for a file if none of its candidates fits. "
+    'Answer in JSON, with one entry per file id, as {"file_1": ["format_XXXX", ...], "file_2": [...]}.'
+)
+
+# Output tokens allowed per file of a batched request
+_BATCH_TOKENS_PER_FILE = 64
+
+
+def build_batch_prompt(files: list[tuple[FileElement, list[str]]]) -> str:
+    """
+    Build the prompt classifying all the files of a module at once.
+
+    Args:
+        files (list): (file, candidate format ids) tuples. The files are identified as file_1, file_2, ... in order.
+
+    Returns:
+        str: The user message, sent after BATCH_SYSTEM_PROMPT.
+    """
+    sections = [
+        f"File id: file_{n}\n{describe_file(element)}\nCandidate formats:\n{describe_candidates(candidate_ids)}"
+        for n, (element, candidate_ids) in enumerate(files, start=1)
+    ]
+    return "\n\n".join(sections)
+
+
+def batch_schema(files: list[tuple[FileElement, list[str]]]) -> dict:
+    """
+    Build the JSON schema of a batched answer: one list of formats per file id, restricted to the candidates of the file.
+
+    Args:
+        files (list): (file, candidate format ids) tuples.
+
+    Returns:
+        dict: The JSON schema.
+    """
+    properties = {
+        f"file_{n}": {"type": "array", "items": {"type": "string", "enum": candidate_ids}}
+        for n, (_, candidate_ids) in enumerate(files, start=1)
+    }
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+def parse_batch_formats(content: str, files: list[tuple[FileElement, list[str]]]) -> list[list[str]]:
+    """
+    Read the formats of each file from a batched JSON answer, keeping only the candidates of the file.
+
+    Args:
+        content (str): The model answer.
+        files (list): (file, candidate format ids) tuples, in the order of the prompt.
+
+    Returns:
+        list: The chosen format ids of each file, in order. Files missing from the answer get an empty list.
+    """
+    try:
+        answer = json.loads(content)
+    except (TypeError, ValueError):
+        answer = None
+    if not isinstance(answer, dict):
+        return [[] for _ in files]
+    return [
+        _keep_candidates(answer.get(f"file_{n}"), candidate_ids)
+        for n, (_, candidate_ids) in enumerate(files, start=1)
+    ]
+
+
+async def classify_files_async(files: list[tuple[FileElement, list[str]]]) -> list[list[str]]:
+    """
+    Ask the model for the formats of several files of a module, in a single call.
+
+    The instructions and module context are processed once for all the files, instead of once per file.
+
+    Args:
+        files (list): (file, candidate format ids) tuples.
+
+    Returns:
+        list: The chosen format ids of each file, in order.
+    """
+    response = await litellm.acompletion(
+        **completion_kwargs(),
+        messages=[
+            {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+            {"role": "user", "content": build_batch_prompt(files)},
+        ],
+        temperature=0.0,
+        max_tokens=_BATCH_TOKENS_PER_FILE * len(files) + CLASSIFIER_MAX_TOKENS,
+        response_format={
+            "type": "json_schema",
+            "json_schema": {"name": "edam_formats_per_file", "schema": batch_schema(files)},
+        },
+    )
+    return parse_batch_formats(response.choices[0].message.content, files)
@@ -0,0 +1,345 @@
+"""
+Model and agent factory.
+
+The models are described in a YAML file (AGENTONTOLOGY_MODELS_FILE), each under a name, e.g.:
+
+    default:
+      backend: ollama          # ollama, llamacpp or openai (any OpenAI-compatible endpoint)
+      model: devstral:latest
+      api_base: http://localhost:11434
+
+The AGENTONTOLOGY_BACKEND, AGENTONTOLOGY_MODEL, AGENTONTOLOGY_API_BASE and AGENTONTOLOGY_API_KEY environment
+variables override the default model, which is ollama devstral:latest without a file.
+An optional "small" model, tried first for the files with candidate formats (see agents/cascade.py),
+can also be set with AGENTONTOLOGY_SMALL_MODEL, e.g. qwen3:0.6b.
+"""
+import asyncio
+import os
+import queue
+import threading
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+import httpx
+import yaml
+from smolagents import CodeAgent, LiteLLMModel
+
+# LiteLLM provider and default endpoint of each backend. llama.cpp serves an OpenAI-compatible API
+BACKENDS = {
+    "ollama": ("ollama_chat", "http://localhost:11434"),
+    "llamacpp": ("openai", "http://localhost:8080/v1"),
+    "openai": ("openai", "http://localhost:8000/v1"),
+}
+
+# Connections kept open to the backend between calls
+_KEEPALIVE_CONNECTIONS = 16
+_KEEPALIVE_EXPIRY = 300.0
+
+
+@dataclass(slots=True)
+class ModelConfig:
+    """
+    A model served by a local backend.
+
+    Attributes:
+        backend (str): "ollama", "llamacpp" or "openai".
+        model (str): The model name on the backend, e.g. "devstral:latest".
+        api_base (str): The backend URL. Defaults to the usual local address of the backend.
+        api_key (str): The API key, if the endpoint requires one.
+        temperature (float): The sampling temperature.
+        max_tokens (int): The maximum number of tokens generated per call.
+        keep_alive (str): How long Ollama keeps the model loaded after a call.
+        num_ctx (int): The Ollama context size. It must not change between calls, Ollama reloads the model when it does.
+        timeout (float): The timeout of a call, in seconds.
+    """
+    backend: str = "ollama"
+    model: str = "devstral:latest"
+    api_base: str = None
+    api_key: str = None
+    temperature: float = 0.0
+    max_tokens: int = 8000
+    keep_alive: str = "30m"
+    num_ctx: int = 16384
+    timeout: float = 600.0
+
+    def __post_init__(self):
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {self.backend!r}, expected one of {', '.join(BACKENDS)}")
+        self.api_base = self.api_base or BACKENDS[self.backend][1]
+
+    @property
+    def model_id(self) -> str:
+        """The LiteLLM model id, e.g. "ollama_chat/devstral:latest"."""
+        return f"{BACKENDS[self.backend][0]}/{self.model}"
+
+    @property
+    def cache_id(self) -> str:
+        """
+        The id of the model in the answer cache keys, e.g. "ollama/devstral:latest".
+
+        It does not depend on the LiteLLM provider of the backend, so that changing the provider (e.g. from "ollama"
+        to "ollama_chat") keeps the cached answers.
+        """
+        return f"{self.backend}/{self.model}"
+
+    def completion_options(self) -> dict:
+        """
+        Return the backend options sent with every call, by the agent and by the direct classifier alike.
+
+        Ollama keeps the model loaded for `keep_alive` with a fixed context size, llama.cpp is asked to keep
+        the evaluated prompt, so that the prefix shared by consecutive calls is not evaluated again.
+
+        Returns:
+            dict: Keyword arguments for `litellm.completion`.
+        """
+        if self.backend == "ollama":
+            return {"keep_alive": self.keep_alive, "num_ctx": self.num_ctx}
+        if self.backend == "llamacpp":
+            return {"extra_body": {"cache_prompt": True}}
+        return {}
+
+
+def load_model_configs(path: str = None) -> dict[str, ModelConfig]:
+    """
+    Read the model configurations.
+
+    Args:
+        path (str): The YAML file describing the models. Defaults to AGENTONTOLOGY_MODELS_FILE, if set.
+
+    Returns:
+        dict: The models keyed by name, with at least the "default" model, and the "small" model if configured.
+
+    Raises:
+        ValueError: If a model has an unknown backend or option.
+    """
+    path = path or os.environ.get("AGENTONTOLOGY_MODELS_FILE")
+    entries = {}
+    if path:
+        with open(path) as fh:
+            entries = yaml.safe_load(fh) or {}
+
+    default = dict(entries.get("default") or {})
+    for option, variable in [("backend", "AGENTONTOLOGY_BACKEND"), ("model", "AGENTONTOLOGY_MODEL"), ("api_base", "AGENTONTOLOGY_API_BASE"), ("api_key", "AGENTONTOLOGY_API_KEY")]:
+        if os.environ.get(variable):
+            default[option] = os.environ[variable]
+    # Kept from the previous configuration of the Ollama model
+    if os.environ.get("AGENTONTOLOGY_KEEP_ALIVE"):
+        default["keep_alive"] = os.environ["AGENTONTOLOGY_KEEP_ALIVE"]
+    if os.environ.get("AGENTONTOLOGY_NUM_CTX"):
+        default["num_ctx"] = int(os.environ["AGENTONTOLOGY_NUM_CTX"])
+    entries["default"] = default
+
+    # The small model of the cascade, on the backend of the default model unless the file says otherwise
+    if os.environ.get("AGENTONTOLOGY_SMALL_MODEL"):
+        small = dict(entries.get("small") or {})
+        if "backend" not in small:
+            for option in ("backend", "api_base", "api_key"):
+                if option in default:
+                    small.setdefault(option, default[option])
+        small["model"] = os.environ["AGENTONTOLOGY_SMALL_MODEL"]
+        entries["small"] = small
+
+    known = {field.name for field in fields(ModelConfig)}
+    configs = {}
+    for name, options in entries.items():
+        unknown = set(options or {}) - known
+        if unknown:
+            raise ValueError(f"Unknown option(s) for model {name!r}: {', '.join(sorted(unknown))}")
+        configs[name] = ModelConfig(**(options or {}))
+    return configs
+
+
+class ModelSessions:
+    """
+    Keep-alive HTTP sessions to the backend of a model, passed to LiteLLM as its client.
+
+    The synchronous session is shared by all threads. Asynchronous sessions belong to an event loop,
+    so one is created per loop (the Gradio loop, or one per module in batch runs).
+    """
+
+    def __init__(self, config: ModelConfig):
+        self.config = config
+        self._lock = threading.Lock()
+        self._sync_client = None
+        self._async_clients = weakref.WeakKeyDictionary()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_keepalive_connections=_KEEPALIVE_CONNECTIONS, keepalive_expiry=_KEEPALIVE_EXPIRY)
+
+    def sync_client(self):
+        """
+        Return the client of the synchronous calls (agent steps, warm-up).
+
+        Returns:
+            The LiteLLM HTTP handler for Ollama, or an OpenAI client for the other backends.
+        """
+        if self._sync_client is None:
+            with self._lock:
+                if self._sync_client is None:
+                    http_client = httpx.Client(limits=self._limits(), timeout=self.config.timeout)
+                    if self.config.backend == "ollama":
+                        from litellm.llms.custom_httpx.http_handler import HTTPHandler
+
+                        self._sync_client = HTTPHandler(timeout=self.config.timeout, client=http_client)
+                    else:
+                        import openai
+
+                        self._sync_client = openai.OpenAI(base_url=self.config.api_base, api_key=self.config.api_key or "none", http_client=http_client, timeout=self.config.timeout)
+        return self._sync_client
+
+    def async_client(self):
+        """
+        Return the client of the asynchronous calls made from the running event loop.
+
+        Returns:
+            The LiteLLM async HTTP handler for Ollama, or an async OpenAI client for the other backends.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            if self.config.backend == "ollama":
+                from litellm.llms.custom_httpx.http_handler import AsyncHTTPHandler
+
+                client = AsyncHTTPHandler(timeout=self.config.timeout)
+            else:
+                import openai
+
+                client = openai.AsyncOpenAI(
+                    base_url=self.config.api_base,
+                    api_key=self.config.api_key or "none",
+                    http_client=httpx.AsyncClient(limits=self._limits(), timeout=self.config.timeout),
+                    timeout=self.config.timeout,
+                )
+            self._async_clients[loop] = client
+        return client
+
+    async def aclose(self):
+        """Close the client of the running event loop. Call it before the loop ends, e.g. at the end of `asyncio.run`."""
+        client = self._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
+
+
+def create_model(config: ModelConfig, sessions: ModelSessions = None) -> LiteLLMModel:
+    """
+    Create the smolagents model of a configuration.
+
+    Args:
+        config (ModelConfig): The model configuration.
+        sessions (ModelSessions): The HTTP sessions to the backend. Defaults to new sessions.
+
+    Returns:
+        LiteLLMModel: The model, sending every call through the keep-alive session.
+    """
+    sessions = sessions or ModelSessions(config)
+    model = LiteLLMModel(
+        model_id=config.model_id,
+        api_base=config.api_base,
+        api_key=config.api_key,
+        temperature=config.temperature,
+        max_tokens=config.max_tokens,
+        timeout=config.timeout,
+        **config.completion_options(),
+    )
+    # Set after creation, smolagents takes the `client` argument for the LiteLLM module itself
+    model.kwargs["client"] = sessions.sync_client()
+    return model
+
+
+def warm_up(config: ModelConfig, sessions: ModelSessions = None) -> bool:
+    """
+    Send a minimal call to a model, so that the backend loads it before the first real request.
+
+    Args:
+        config (ModelConfig): The model configuration.
+        sessions (ModelSessions): The HTTP sessions to the backend.
+
+    Returns:
+        bool: True if the model answered.
+    """
+    import litellm
+
+    try:
+        litellm.completion(
+            model=config.model_id,
+            api_base=config.api_base,
+            api_key=config.api_key,
+            messages=[{"role": "user", "content": "ok"}],
+            max_tokens=1,
+            client=(sessions or ModelSessions(config)).sync_client(),
+            **config.completion_options(),
+        )
+    except Exception as e:
+        print(f"Warm-up of {config.model_id} at {config.api_base} failed: {e}")
+        return False
+    print(f"Model {config.model_id} is loaded")
+    return True
+
+
+class AgentPool:
+    """
+    Pool of reusable agents, for concurrent use.
+
+    An agent runs one task at a time and resets its memory at the start of each run, so instances are handed
+    out to one caller at a time and returned afterwards instead of being rebuilt for every file.
+    The variables and functions left by the code of the previous run are cleared when an agent is handed out.
+    Agents are created on demand, up to `size`; callers wait for a free one beyond that. The instance can be shared between threads.
+    """
+
+    def __init__(self, factory, size: int):
+        self._factory = factory
+        self._size = size
+        self._created = 0
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def agent(self):
+        """Borrow an agent for the duration of the `with` block."""
+        try:
+            agent = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self._size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    agent = self._factory()
+                except BaseException:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                agent = self._idle.get()
+        self._reset(agent)
+        try:
+            yield agent
+        finally:
+            self._idle.put(agent)
+
+    @staticmethod
+    def _reset(agent):
+        # run(reset=True) only resets the memory, the Python executor keeps its state from one run to the next
+        executor = getattr(agent, "python_executor", None)
+        if executor is not None and hasattr(executor, "state"):
+            executor.state = {"__name__": "__main__"}
+            executor.custom_tools = {}
+
+
+def create_code_agent(model: LiteLLMModel, tools: list) -> CodeAgent:
+    """
+    Create a new agent.
+
+    Args:
+        model (LiteLLMModel): The model, shared by all the agents.
+        tools (list): The agent tools.
+
+    Returns:
+        CodeAgent: A new agent.
+    """
+    return CodeAgent(
+        tools=tools,
+        model=model,
+        additional_authorized_imports=["inspect", "json"]
+    )
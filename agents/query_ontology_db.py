@@ -1,18 +1,59 @@
-from smolagents import CodeAgent, LiteLLMModel
-from tools.fetch_ontology_tools import search_edam_ontology_by_search_term, get_edam_description_from_ontology_format_class
-
-model = LiteLLMModel(
-    model_id="ollama/devstral:latest",
-    #model_id="ollama/qwen3:0.6b",
-    api_base="http://localhost:11434",
-    temperature=0.0,
-    max_tokens=8000,
-)
-
-tool_list = [search_edam_ontology_by_search_term, get_edam_description_from_ontology_format_class]
-
-agent = CodeAgent(
-    tools=tool_list,
-    model=model,
-    additional_authorized_imports=["inspect", "json"]
-)
\ No newline at end of file
+import os
+import threading
+from smolagents import CodeAgent
+from tools.fetch_ontology_tools import search_edam_ontology_by_search_term, get_edam_description_from_ontology_format_class, get_edam_term_details, semantic_search_edam, semantic_search_available
+from tools.llm_usage import get_llm_usage
+from agents.model_factory import ModelSessions, create_code_agent, create_model, load_model_configs, warm_up
+
+# The models are configured with AGENTONTOLOGY_MODELS_FILE or environment variables, see agents/model_factory.py
+model_configs = load_model_configs()
+model_config = model_configs["default"]
+model_sessions = ModelSessions(model_config)
+model = create_model(model_config, model_sessions)
+
+# The small model of the cascade, None if not configured
+small_model_config = model_configs.get("small")
+small_model_sessions = ModelSessions(small_model_config) if small_model_config else None
+
+# Reports the prompt-eval and eval tokens of every call
+get_llm_usage()
+
+tool_list = [search_edam_ontology_by_search_term, get_edam_description_from_ontology_format_class, get_edam_term_details]
+if semantic_search_available():
+    tool_list.append(semantic_search_edam)
+
+def create_agent() -> CodeAgent:
+    """
+    Create a new ontology agent.
+
+    Agents keep the memory of their current run, so a separate instance is needed for each file annotated concurrently.
+    All the instances share the same model.
+
+    Returns:
+        CodeAgent: A new agent with the EDAM ontology tools.
+    """
+    return create_code_agent(model, tool_list)
+
+def warm_up_models(background: bool = True):
+    """
+    Load the models on their backend before the first request, unless AGENTONTOLOGY_WARM_UP=0.
+
+    Args:
+        background (bool): Send the warm-up call from a daemon thread instead of waiting for it.
+    """
+    if os.environ.get("AGENTONTOLOGY_WARM_UP", "1") == "0":
+        return
+    models = [(model_config, model_sessions)]
+    if small_model_config:
+        models.append((small_model_config, small_model_sessions))
+    for config, sessions in models:
+        if background:
+            threading.Thread(target=warm_up, args=(config, sessions), daemon=True).start()
+        else:
+            warm_up(config, sessions)
+
+async def close_model_sessions():
+    """Close the asynchronous sessions of the models opened on the running event loop, before it ends."""
+    for sessions in (model_sessions, small_model_sessions):
+        if sessions is not None:
+            await sessions.aclose()
@@ -0,0 +1,156 @@
+"""
+Headless batch annotation of nf-core modules.
+
+Annotates many modules with a shared EDAM index, shared caches and a concurrent scheduler,
+and writes the updated meta.yml files to an output directory or in place, or a single patch for nf-core/modules.
+Only the ontologies are added to the files, the rest of their content keeps its formatting.
+Finished modules are recorded in a state file, so an interrupted run can be resumed by running the same command again.
+
+Usage:
+    python batch.py fastqc bwa/mem --output-dir annotated
+    python batch.py --modules-dir ~/nf-core-modules --in-place
+    python batch.py --modules-dir ~/nf-core-modules --patch ontologies.patch
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import yaml
+from tools.meta_yml_tools import update_meta_yml_text
+from tools.meta_yml_writer import meta_yml_diff
+from tools.meta_yml_sources import MetaYmlSource, module_name_to_path, open_meta_yml_source
+from tools.module_meta import ModuleMeta
+from pipeline import annotate_files
+from agents.query_ontology_db import warm_up_models
+
+
+def load_state(state_file: str) -> dict:
+    """
+    Read the state file of a previous run.
+
+    Args:
+        state_file (str): The path to the state file (one JSON record per line).
+
+    Returns:
+        dict: The last record of each module, keyed by module name.
+    """
+    state = {}
+    if os.path.exists(state_file):
+        with open(state_file) as fh:
+            for line in fh:
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    state[record["module"]] = record
+    return state
+
+
+def annotate_module(module_name: str, source: MetaYmlSource, output_dir: str = None, in_place: bool = False, patch: str = None, patch_lock: threading.Lock = None) -> dict:
+    """
+    Annotate the files of one module and write its updated meta.yml file.
+
+    Args:
+        module_name (str): The module name or its path relative to modules/nf-core.
+        source (MetaYmlSource): The source to read the meta.yml file from.
+        output_dir (str): The directory where the updated meta.yml is written, as <output_dir>/<module path>/meta.yml.
+        in_place (bool): Overwrite the meta.yml file of the local checkout instead of writing to output_dir.
+        patch (str): Append the changes as a unified diff to this file instead of writing the meta.yml file.
+        patch_lock (threading.Lock): Lock serializing the writes to the patch file between modules.
+
+    Returns:
+        dict: The record of the run: module name, number of files, ontologies found, output path and duration.
+    """
+    start = time.perf_counter()
+    module_path = module_name if "/" in module_name else module_name_to_path(module_name)
+
+    meta_yml_text = source.get_text(module_name)
+    module_meta = ModuleMeta(yaml.safe_load(meta_yml_text))
+
+    files = module_meta.files
+    results = annotate_files(files) if files else {"input": {}, "output": {}}
+    updated_meta_yml = update_meta_yml_text(results["input"], results["output"], meta_yml_text, module_meta)
+
+    if patch:
+        output_path = patch
+        diff = meta_yml_diff(meta_yml_text, updated_meta_yml, f"modules/nf-core/{module_path}/meta.yml")
+        with patch_lock or threading.Lock(), open(output_path, "a", newline="") as fh:
+            fh.write(diff)
+    else:
+        if in_place:
+            output_path = source.path(module_name)
+        else:
+            output_path = os.path.join(output_dir, module_path, "meta.yml")
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        # The line endings of the original file are kept, see `LocalMetaYmlSource.get_text`
+        with open(output_path, "w", newline="") as fh:
+            fh.write(updated_meta_yml)
+
+    return {
+        "module": module_name,
+        "status": "done",
+        "files": len(files),
+        "results": results,
+        "output": output_path,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Annotate nf-core modules with EDAM ontology terms.")
+    parser.add_argument("modules", nargs="*", help="Module names (e.g. fastqc, bwa/mem). Defaults to all the modules of --modules-dir.")
+    parser.add_argument("--modules-dir", help="Local nf-core/modules checkout (or tarball) to read the meta.yml files from. Defaults to GitHub.")
+    parser.add_argument("--output-dir", default="annotated_modules", help="Directory where the updated meta.yml files are written.")
+    parser.add_argument("--in-place", action="store_true", help="Overwrite the meta.yml files of --modules-dir.")
+    parser.add_argument("--patch", help="Append the changes to this file as a unified diff, to apply with `git apply` in nf-core/modules, instead of writing the meta.yml files.")
+    parser.add_argument("--workers", type=int, default=2, help="Number of modules annotated concurrently.")
+    parser.add_argument("--state-file", default="batch_state.jsonl", help="File recording finished modules, used to resume an interrupted run.")
+    args = parser.parse_args(argv)
+
+    if args.in_place and not (args.modules_dir and os.path.isdir(args.modules_dir)):
+        parser.error("--in-place requires --modules-dir to be a local checkout")
+    if not args.modules and not args.modules_dir:
+        parser.error("provide module names or --modules-dir")
+
+    # The model loads while the modules are listed
+    warm_up_models()
+
+    # Every meta.yml file is indexed once and shared by all the workers
+    source = open_meta_yml_source(args.modules_dir)
+    try:
+        modules = args.modules or source.list_modules()
+    except ValueError as e:
+        parser.error(str(e))
+    state = load_state(args.state_file)
+    todo = [module for module in modules if state.get(module, {}).get("status") != "done"]
+    print(f"{len(modules)} modules, {len(modules) - len(todo)} already done, {len(todo)} to annotate")
+
+    state_lock = threading.Lock()
+    patch_lock = threading.Lock()
+    batch_start = time.perf_counter()
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as executor:
+        futures = {
+            executor.submit(annotate_module, module, source, args.output_dir, args.in_place, args.patch, patch_lock): module
+            for module in todo
+        }
+        for i, future in enumerate(as_completed(futures), start=1):
+            module = futures[future]
+            try:
+                record = future.result()
+                print(f"[{i}/{len(todo)}] {module}: {record['files']} files in {record['seconds']:.1f}s -> {record['output']}")
+            except Exception as e:
+                failed += 1
+                record = {"module": module, "status": "error", "error": str(e)}
+                print(f"[{i}/{len(todo)}] {module}: error: {e}")
+            # Appended as soon as a module finishes, so that an interruption loses at most the running modules
+            with state_lock, open(args.state_file, "a") as fh:
+                fh.write(json.dumps(record) + "\n")
+
+    print(f"Annotated {len(todo) - failed} modules in {time.perf_counter() - batch_start:.1f}s ({failed} failed)")
+
+
+if __name__ == "__main__":
+    main()
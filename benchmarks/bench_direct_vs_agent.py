@@ -0,0 +1,93 @@
+"""
+Benchmark of the direct mode against the agent mode: latency per file and agreement of the formats found.
+
+Every file is annotated by the agent and by a single call among the candidates retrieved from the EDAM index,
+one file at a time and without the answer cache. Files resolved from the EDAM index without a model are skipped,
+since both modes handle them the same way. Requires the LLM server (Ollama by default).
+
+Usage:
+    python -m benchmarks.bench_direct_vs_agent fastqc bwa/mem samtools/sort
+    python -m benchmarks.bench_direct_vs_agent --modules-dir ~/nf-core-modules --limit 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from tools.format_resolver import pre_resolve_file_format
+from tools.meta_yml_sources import open_meta_yml_source
+from tools.module_meta import ModuleMeta
+from agents.query_ontology_db import close_model_sessions
+from pipeline import ask_model, build_file_prompt
+
+
+async def annotate(element, mode: str) -> tuple[list[str], float, bool]:
+    """Annotate a file in a mode, returning the formats, the elapsed seconds and whether the single call was used."""
+    start = time.perf_counter()
+    prompt, candidates = await build_file_prompt(element, mode)
+    formats = await ask_model(prompt, candidates)
+    return formats, time.perf_counter() - start, bool(candidates)
+
+
+def jaccard(a: list[str], b: list[str]) -> float:
+    """Overlap of two format lists, 1.0 when both are empty."""
+    union = set(a) | set(b)
+    return len(set(a) & set(b)) / len(union) if union else 1.0
+
+
+async def run(modules: list[str], source) -> list[dict]:
+    rows = []
+    try:
+        for module in modules:
+            for element in ModuleMeta(source.get(module)).files:
+                if pre_resolve_file_format(element.name, element.attributes):
+                    continue
+                agent_formats, agent_time, _ = await annotate(element, "agent")
+                direct_formats, direct_time, single_call = await annotate(element, "direct")
+                rows.append({
+                    "file": f"{module}:{element.direction}:{element.key}",
+                    "agent": agent_formats,
+                    "direct": direct_formats,
+                    "agent_time": agent_time,
+                    "direct_time": direct_time,
+                    "single_call": single_call,
+                })
+                row = rows[-1]
+                print(f"{row['file']:<48}{agent_time:>10.1f}{direct_time:>10.1f}{jaccard(agent_formats, direct_formats):>9.2f}  {agent_formats} / {direct_formats}")
+    finally:
+        await close_model_sessions()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the latency and answers of the direct and agent modes.")
+    parser.add_argument("modules", nargs="*", help="Module names (e.g. fastqc, bwa/mem). Defaults to the modules of --modules-dir.")
+    parser.add_argument("--modules-dir", help="Local nf-core/modules checkout (or tarball). Defaults to GitHub.")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum number of modules taken from --modules-dir.")
+    args = parser.parse_args(argv)
+    if not args.modules and not args.modules_dir:
+        parser.error("provide module names or --modules-dir")
+
+    source = open_meta_yml_source(args.modules_dir)
+    try:
+        modules = args.modules or source.list_modules()[:args.limit]
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"{'file':<48}{'agent (s)':>10}{'direct (s)':>10}{'jaccard':>9}  formats (agent / direct)")
+    rows = asyncio.run(run(modules, source))
+    if not rows:
+        print("No file needs a model")
+        return
+
+    agent_total = sum(row["agent_time"] for row in rows)
+    direct_total = sum(row["direct_time"] for row in rows)
+    print(f"\n{len(rows)} files, {sum(row['single_call'] for row in rows)} classified in a single call (the others had no candidate)")
+    print(f"Latency per file: agent median {statistics.median(row['agent_time'] for row in rows):.1f}s, direct median {statistics.median(row['direct_time'] for row in rows):.1f}s")
+    print(f"Total: agent {agent_total:.1f}s, direct {direct_total:.1f}s ({agent_total / max(direct_total, 1e-9):.1f}x)")
+    print(f"Agreement: {sum(set(row['agent']) == set(row['direct']) for row in rows) / len(rows):.0%} identical, "
+          f"{sum(bool(set(row['agent']) & set(row['direct'])) for row in rows) / len(rows):.0%} overlapping, "
+          f"mean Jaccard {statistics.mean(jaccard(row['agent'], row['direct']) for row in rows):.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Micro-benchmark of the EDAM format search: the original linear scan over the ontology
+against the precomputed EdamIndex, unranked (search) and ranked with BM25 (rank, top 10).
+
+Usage:
+    python -m benchmarks.bench_edam_search
+"""
+import time
+import timeit
+from tools.fetch_ontology_tools import get_edam_ontology
+from tools.edam_index import EdamIndex
+
+QUERIES = ["fasta", "fastq", "bam", "html", "zip", "vcf", "sequence", "alignment"]
+REPEAT = 20
+
+
+def legacy_scan(onto, search_term: str) -> list[str]:
+    """The search as it was implemented before the index: IRI search and a substring scan on every call."""
+    search_term_lower = search_term.lower()
+    filtered_matches = []
+    for match in onto.search(iri="*format_*"):
+        if search_term_lower in match.name.lower():
+            filtered_matches.append(match)
+            continue
+        if hasattr(match, 'label') and match.label:
+            for label in match.label:
+                if search_term_lower in str(label).lower():
+                    filtered_matches.append(match)
+                    break
+    return [match.name for match in filtered_matches]
+
+
+def main():
+    onto = get_edam_ontology()
+    if onto is None:
+        raise RuntimeError("Could not load the EDAM ontology")
+
+    start = time.perf_counter()
+    index = EdamIndex.from_ontology(onto)
+    build_time = time.perf_counter() - start
+    print(f"Index build: {build_time * 1000:.1f} ms for {len(index.terms)} formats\n")
+
+    print(f"{'query':<12}{'matches':>9}{'scan (ms)':>12}{'index (ms)':>12}{'speedup':>10}{'rank (ms)':>12}")
+    for query in QUERIES:
+        # The index also matches synonyms and file extensions, so it must find at least what the scan finds
+        assert set(legacy_scan(onto, query)) <= set(index.search(query)), query
+        scan_time = timeit.timeit(lambda: legacy_scan(onto, query), number=REPEAT) / REPEAT
+        index_time = timeit.timeit(lambda: index.search(query), number=REPEAT) / REPEAT
+        rank_time = timeit.timeit(lambda: index.rank(query), number=REPEAT) / REPEAT
+        print(f"{query:<12}{len(index.search(query)):>9}{scan_time * 1000:>12.3f}{index_time * 1000:>12.3f}{scan_time / index_time:>9.0f}x{rank_time * 1000:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
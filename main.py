@@ -1,27 +1,61 @@
 import gradio as gr
-from tools.meta_yml_tools import get_meta_yml_file, extract_tools_from_meta_json, extract_information_from_meta_json, extract_module_name_description, update_meta_yml
+from tools.meta_yml_tools import get_meta_yml_text_async, extract_tools_from_meta_json, extract_information_from_meta_json, extract_module_name_description, update_meta_yml_text
 from tools.bio_tools_tools import get_biotools_response, get_biotools_ontology
-from agents.query_ontology_db import agent
-import yaml
-import time
-import re
+from tools.artifact_store import get_artifact_store
+from tools.http_client import get_http_client
+from tools.module_meta import ModuleMeta
+from pipeline import annotate_files_async
+from agents.query_ontology_db import close_model_sessions, warm_up_models
 import io
 import logging
+import re
+import yaml
+import asyncio
 import threading
-from contextlib import redirect_stdout, redirect_stderr
-import queue
+import contextlib
+import contextvars
+import functools
 import sys
+from collections import deque
 from ansi2html import Ansi2HTMLConverter
 
-# Global log queue for streaming logs to Gradio
-log_queue = queue.Queue()
+# Queued by the pipeline of a session when its progress changes and when it finishes
+PROGRESS_EVENT = object()
+DONE_EVENT = object()
+
+class SessionQueue:
+    """Queue of the logs and events of one Gradio session, fed from any thread and read on the event loop"""
+
+    def __init__(self):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.loop_thread = threading.get_ident()
+
+    def put(self, item):
+        if threading.get_ident() == self.loop_thread:
+            self.queue.put_nowait(item)
+        else:
+            try:
+                self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+            except RuntimeError:
+                # The event loop is closed, the session is gone
+                pass
+
+    async def get(self):
+        return await self.queue.get()
+
+    def get_nowait(self):
+        return self.queue.get_nowait()
+
+# Log queue of the Gradio session running in the current context (None outside a session).
+# Each request gets its own queue, so concurrent sessions never see each other's logs.
+session_log_queue = contextvars.ContextVar("session_log_queue", default=None)
 
 class GradioLogHandler(logging.Handler):
-    """Custom logging handler that sends logs to both terminal and Gradio queue"""
+    """Custom logging handler that sends logs to both terminal and the Gradio queue of the current session"""
     
-    def __init__(self, log_queue):
+    def __init__(self):
         super().__init__()
-        self.log_queue = log_queue
         self.terminal_handler = logging.StreamHandler(sys.__stdout__)
         self.terminal_handler.setFormatter(
             logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -32,33 +66,97 @@ class GradioLogHandler(logging.Handler):
         self.terminal_handler.emit(record)
         
         # Send to Gradio queue
+        log_queue = session_log_queue.get()
+        if log_queue is None:
+            return
         try:
             log_msg = self.format(record)
-            self.log_queue.put(log_msg)
+            log_queue.put(log_msg + "\n")
         except Exception:
             pass
 
 class QueueWriter:
-    """A stream-like object that writes to a queue, to capture stdout."""
-    def __init__(self, queue):
-        self.queue = queue
+    """A stream-like object that writes to the terminal and to the queue of the current session, to capture stdout."""
+    def __init__(self, terminal):
+        self.terminal = terminal
 
     def write(self, text):
         # Print raw output to terminal to preserve colors
-        sys.__stdout__.write(text)
-        sys.__stdout__.flush()
+        self.terminal.write(text)
+        self.terminal.flush()
 
         # Put the raw text with ANSI codes into the queue for HTML conversion
-        self.queue.put(text)
+        log_queue = session_log_queue.get()
+        if log_queue is not None:
+            log_queue.put(text)
 
     def flush(self):
         # Also flush stdout
-        sys.__stdout__.flush()
+        self.terminal.flush()
+
+    def __getattr__(self, name):
+        # Everything else (isatty, fileno, encoding, buffer, ...) is the terminal's, libraries such as uvicorn inspect them
+        return getattr(self.terminal, name)
+
+# ANSI select graphic rendition (colour and style) escape sequences
+_SGR_RE = re.compile(r"\x1b\[([0-9;]*)m")
+
+class LogRenderer:
+    """
+    Incremental ANSI to HTML renderer for the live logs.
+
+    Only new text is converted, complete lines are kept in a ring buffer of `max_lines` rendered lines,
+    and the HTML of the tail is cached until new text arrives. The cost of a refresh therefore
+    does not depend on the length of the run.
+    Each line is converted on its own, so the styles still open at the end of a line are replayed at the start of the next one.
+    """
+
+    def __init__(self, max_lines=1000, max_pending_chars=10000):
+        self.converter = Ansi2HTMLConverter(dark_bg=True, line_wrap=False)
+        self.lines = deque(maxlen=max_lines)
+        self.max_pending_chars = max_pending_chars
+        self.pending = ""  # Last line, not terminated yet
+        self.open_style = ""  # SGR sequences in effect at the end of the last complete line
+        self._html = None
+
+    def _convert(self, line):
+        """Convert a line to HTML with the styles left open by the previous lines"""
+        return self.converter.convert(self.open_style + line, full=False)
+
+    def _carry_style(self, line):
+        """Update the open styles with the SGR sequences of a line, a reset clearing them"""
+        for match in _SGR_RE.finditer(line):
+            codes = match.group(1)
+            if codes.split(";")[0] in ("", "0"):
+                self.open_style = "" if codes in ("", "0") else match.group(0)
+            else:
+                self.open_style += match.group(0)
+
+    def append(self, text):
+        """Convert the complete lines of a new chunk of raw logs"""
+        *complete, self.pending = (self.pending + text).split("\n")
+        # Never hold an unbounded line, e.g. a progress bar redrawn with carriage returns
+        if len(self.pending) > self.max_pending_chars:
+            complete.append(self.pending)
+            self.pending = ""
+        for line in complete:
+            self.lines.append(self._convert(line))
+            self._carry_style(line)
+        self._html = None
+
+    def html(self):
+        """Return the logs tail wrapped in the live logs container"""
+        if self._html is None:
+            tail = "\n".join(self.lines)
+            if self.pending:
+                tail += "\n" + self._convert(self.pending)
+            self._html = f"<div class='live-logs-container'><pre class='live-logs'>{tail}</pre></div>"
+        return self._html
 
 def setup_logging():
     """Setup logging to capture smolagents logs"""
     # Create custom handler
-    gradio_handler = GradioLogHandler(log_queue)
+    gradio_handler = GradioLogHandler()
     gradio_handler.setFormatter(
         logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     )
@@ -73,25 +171,18 @@ def setup_logging():
         logger = logging.getLogger(logger_name)
         logger.setLevel(logging.INFO)
         logger.addHandler(gradio_handler)
+
+    # Installed once for the whole process instead of redirecting stdout per request,
+    # the writer routes each write to the session of the calling context
+    sys.stdout = QueueWriter(sys.__stdout__)
+    sys.stderr = QueueWriter(sys.__stderr__)
     
     return gradio_handler
 
 # Initialize logging setup
 log_handler = setup_logging()
 
-def extract_format_terms_from_result(result):
-    """Extract EDAM format terms from agent result string"""
-    if isinstance(result, str):
-        # Look for format_XXXX patterns in the result using regex
-        format_matches = re.findall(r"format_\d+", result)
-        return format_matches
-    elif isinstance(result, list):
-        # If it's already a list, filter for format terms
-        return [
-            item for item in result if isinstance(item, str) and item.startswith("format_")
-        ]
-    return []
-
+@functools.lru_cache(maxsize=None)
 def create_header_html(animation_state="idle"):
     """Create header HTML with different animation states"""
     
@@ -121,6 +212,7 @@ def create_header_html(animation_state="idle"):
     </div>
     """
 
+@functools.lru_cache(maxsize=256)
 def create_progress_bar_html(progress, status, current_input, current_count=0, total_count=0):
     """Create an animated progress bar HTML with nf-core styling"""
     
@@ -159,7 +251,7 @@ def create_progress_bar_html(progress, status, current_input, current_count=0, t
     
     return progress_html
 
-def format_ontology_results_html(results, meta_yml):
+def format_ontology_results_html(results, module_meta):
     """Format the ontology results into a nice HTML display with clickable links"""
     
     # Check if there are any ontology results in either input or output
@@ -174,28 +266,12 @@ def format_ontology_results_html(results, meta_yml):
         </div>
     """
     
-    # Group inputs and outputs by their descriptions from meta_yml
-    input_info = {}
-    for input_channel in meta_yml.get("input", []):
-        for ch_element in input_channel:
-            for key, value in ch_element.items():
-                if value.get("type") == "file":
-                    input_info[key] = value.get("description", "No description available")
-    
-    # Also include output descriptions
-    for output in meta_yml.get("output", []):
-        for key, output_channel in output.items():
-            for out_element in output_channel:
-                for element_name, value in out_element.items():
-                    if value.get("type") == "file" and element_name != "versions.yml":
-                        input_info[key] = value.get("description", "No description available")
-    
-    final = {}
-    final.update(results["input"])
-    final.update(results["output"])
-    for input_name, format_terms in final.items():
+    # Inputs then outputs, described by their element in the module index
+    final = [(direction, key, terms) for direction in ("input", "output") for key, terms in results[direction].items()]
+    for direction, input_name, format_terms in final:
         # format_terms is already a list of format terms extracted earlier
-        description = input_info.get(input_name, "No description available")
+        element = module_meta.get(direction, input_name)
+        description = element.description if element else "No description available"
         
         html_content += f"""
         <div class='input-section'>
@@ -236,103 +312,42 @@ def format_ontology_results_html(results, meta_yml):
     
     return html_content
 
-def run_multi_agent_with_logs(module_name, progress_callback=None):
+async def run_multi_agent_with_logs(module_name, progress_callback=None):
     """Enhanced function with progress tracking and live log streaming"""
     
-    # Clear the log queue before starting
-    while not log_queue.empty():
-        try:
-            log_queue.get_nowait()
-        except queue.Empty:
-            break
-    
     results = {"input": {}, "output": {}}
-    meta_yml = None
     
     try:
         ### RETRIEVE INFORMATION FROM META.YML ###
         if progress_callback:
             progress_callback(0, "Fetching meta.yml file...", "", 0, 0, "rotating")
         
-        meta_yml = get_meta_yml_file(module_name=module_name)
-        time.sleep(0.5)
+        meta_yml_text = await get_meta_yml_text_async(module_name=module_name)
+        # Index the file inputs + outputs once, every later step uses it
+        module_meta = ModuleMeta(yaml.safe_load(meta_yml_text))
 
         ### FETCH ONTOLOGY TERMS FROM EDAM DATABASE ###
-        # Count total file inputs + outputs
-        total_files = 0
-        file = []
-        for input_channel in meta_yml.get("input", []):
-            for ch_element in input_channel:
-                for key, value in ch_element.items():
-                    if value.get("type") == "file":
-                        total_files += 1
-                        file.append((key, value))
-        for output in meta_yml.get("output", []):
-            for key, output_channel in output.items():
-                for out_element in output_channel:
-                    for element_name, value in out_element.items():
-                        if value["type"] == "file" and element_name != "versions.yml":
-                            total_files += 1
-                            file.append((key, value))
+        files = module_meta.files
+        total_files = len(files)
 
         if total_files == 0:
             if progress_callback:
                 progress_callback(100, "No file inputs found", "", 0, 0, "celebrating")
-            formatted_results = format_ontology_results_html(results, meta_yml)
-            return formatted_results, "tmp_meta.yml"
-
-        current_files = 0
-        
-        #inputs
-        for input_channel in meta_yml["input"]:
-            for ch_element in input_channel:
-                for key, value in ch_element.items():
-                    if value["type"] == "file":
-                        # Update progress BEFORE processing starts for this input
-                        if progress_callback:
-                            progress_callback(int((current_files / total_files) * 100), f"Starting analysis of input: {key}", key, current_files, total_files, "rotating")
-                        
-                        # This is where the agent runs - logs should be captured automatically
-                        result = agent.run(f"You are presentend with a file format for the input {key}, which is a file and is described by the following description: '{value['description']}', search for the best matches out of possible matches in the edam ontology (formated as format_XXXX), and return the answer (a list of ontology classes) in a final_answer call such as final_answer([format_XXXX, format_XXXX, ...])")
-                        # Extract format terms from the agent result
-                        format_terms = extract_format_terms_from_result(result)
-                        results["input"][key] = format_terms
-                                                
-                        # Update progress AFTER processing completes for this input
-                        current_files += 1
-                        progress = int((current_files / total_files) * 100)
-                        if progress_callback:
-                            progress_callback(progress, f"Completed analysis of input: {key}", key, current_files, total_files, "rotating")
-        
-        #outputs
-        for output in meta_yml.get("output", []):
-            for key, output_channel in output.items():
-                for out_element in output_channel:
-                    for element_name, value in out_element.items():
-                        if value["type"] == "file" and element_name != "versions.yml":
-                            # Update progress BEFORE processing starts for this output
-                            if progress_callback:
-                                progress_callback(int((current_files / total_files) * 100), f"Starting analysis of output: {key}", key, current_files, total_files, "rotating")
-                            
-                            # This is where the agent runs - logs should be captured automatically
-                            result = agent.run(f"You are presentend with a file format for the output '{element_name}', which is a file and is described by the following description: '{value['description']}', search for the best matches out of possible matches in the edam ontology (formated as format_XXXX), and return the answer (a list of ontology classes) in a final_answer call such as final_answer([format_XXXX, format_XXXX, ...]). The output name {key} can also give you more information.")
-                            # Extract format terms from the agent result
-                            format_terms = extract_format_terms_from_result(result)
-                            results["output"][key] = format_terms
-                                                        
-                            # Update progress AFTER processing completes for this output
-                            current_files += 1
-                            progress = int((current_files / total_files) * 100)
-                            if progress_callback:
-                                progress_callback(progress, f"Completed analysis of output: {key}", key, current_files, total_files, "rotating")
+        else:
+            results = await annotate_files_async(files, progress_callback)
 
-        if progress_callback:
-            progress_callback(100, "Analysis complete! Generating results...", "", total_files, total_files, "celebrating")
+            if progress_callback:
+                progress_callback(100, "Analysis complete! Generating results...", "", total_files, total_files, "celebrating")
 
         ### UPDATE META.YML FILE ADDING ONTOLOGIES AND RETURN THE ANSWER ###
-        with open("tmp_meta.yml", "w") as fh:
-            updated_meta_yml = update_meta_yml(results["input"].copy(), results["output"].copy(), meta_yml)
-            yaml.dump(updated_meta_yml, fh)
+        # Each request gets its own file, the same module with the same results is written only once
+        artifact_store = get_artifact_store()
+        artifact_key = artifact_store.make_key(module_name, meta_yml_text, results)
+        meta_yml_path = artifact_store.get(artifact_key)
+        if meta_yml_path is None:
+            # Only the ontologies are added, the rest of the file keeps its formatting
+            updated_meta_yml = update_meta_yml_text(results["input"], results["output"], meta_yml_text, module_meta)
+            meta_yml_path = await asyncio.to_thread(artifact_store.put, artifact_key, updated_meta_yml)
         
     except Exception as e:
         if progress_callback:
@@ -340,17 +355,19 @@ def run_multi_agent_with_logs(module_name, progress_callback=None):
         raise e
     
     # Format the results into a nice HTML display
-    formatted_results = format_ontology_results_html(results, meta_yml)
+    formatted_results = format_ontology_results_html(results, module_meta)
     
-    return formatted_results, "tmp_meta.yml"
+    return formatted_results, meta_yml_path
 
-def stream_logs_and_run_agent(module_name):
-    """Generator function that streams logs while running the agent"""
+async def stream_logs_and_run_agent(module_name):
+    """Async generator that streams logs while running the agent"""
     
-    # Start the agent in a separate thread
     result_container = {"ontology_output": None, "file_output": None, "error": None}
     progress_container = {"progress": 0, "status": "Initializing...", "current_files": "", "current_count": 0, "total_count": 0, "animation_state": "rotating"}
-    
+
+    # Logs of this request, and the events telling the stream loop that something changed
+    log_queue = SessionQueue()
+
     def progress_callback(progress, status, current_files, current_count=0, total_count=0, animation_state="rotating"):
         progress_container["progress"] = progress
         progress_container["status"] = status
@@ -358,32 +375,48 @@ def stream_logs_and_run_agent(module_name):
         progress_container["current_count"] = current_count
         progress_container["total_count"] = total_count
         progress_container["animation_state"] = animation_state
-    
-    def run_agent_thread():
+        log_queue.put(PROGRESS_EVENT)
+
+    async def run_agent_task():
+        # The task runs in a copy of the current context, bind it (and the threads it spawns) to this session
+        session_log_queue.set(log_queue)
         try:
-            queue_writer = QueueWriter(log_queue)
-            with redirect_stdout(queue_writer), redirect_stderr(queue_writer):
-                ontology_output, file_output = run_multi_agent_with_logs(module_name, progress_callback)
-                result_container["ontology_output"] = ontology_output
-                result_container["file_output"] = file_output
+            ontology_output, file_output = await run_multi_agent_with_logs(module_name, progress_callback)
+            result_container["ontology_output"] = ontology_output
+            result_container["file_output"] = file_output
         except Exception as e:
             # The error will be redirected to the queue via stderr
             result_container["error"] = str(e)
+        finally:
+            log_queue.put(DONE_EVENT)
     
-    # Start the thread
-    agent_thread = threading.Thread(target=run_agent_thread)
-    agent_thread.start()
+    # Start the pipeline on the event loop, no thread is held while it waits
+    agent_task = asyncio.create_task(run_agent_task())
     
     # Stream logs while the agent is running
-    accumulated_logs = ""
-    converter = Ansi2HTMLConverter(dark_bg=True, line_wrap=False)
+    log_renderer = LogRenderer()
+    last_progress_html = None
+    last_header_html = None
+    done = False
+
+    try:
+        while not done:
+            # Wait until the agent logs something or reports progress, then take everything already queued
+            events = [await log_queue.get()]
+            while True:
+                try:
+                    events.append(log_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            logs_changed = False
+            for event in events:
+                if event is DONE_EVENT:
+                    done = True
+                elif event is not PROGRESS_EVENT:
+                    log_renderer.append(event)
+                    logs_changed = True
 
-    while agent_thread.is_alive() or not log_queue.empty():
-        try:
-            # Get log message with a short timeout
-            log_msg = log_queue.get(timeout=0.1)
-            accumulated_logs += log_msg
-            
             # Create progress bar HTML
             progress_html = create_progress_bar_html(
                 progress_container["progress"],
@@ -395,48 +428,44 @@ def stream_logs_and_run_agent(module_name):
             
             # Create header HTML with animation
             header_html = create_header_html(progress_container["animation_state"])
+
+            if done:
+                break
             
-            # Yield the updated logs, progress, and header
-            html_logs = converter.convert(accumulated_logs, full=False)
-            yield f"<div class='live-logs-container'><pre class='live-logs'>{html_logs}</pre></div>", None, None, progress_html, header_html
-            
-        except queue.Empty:
-            # If no new logs and thread is still alive, yield current state
-            if agent_thread.is_alive():
-                progress_html = create_progress_bar_html(
-                    progress_container["progress"],
-                    progress_container["status"],
-                    progress_container["current_files"],
-                    progress_container["current_count"],
-                    progress_container["total_count"]
-                )
-                header_html = create_header_html(progress_container["animation_state"])
-                html_logs = converter.convert(accumulated_logs, full=False)
-                yield f"<div class='live-logs-container'><pre class='live-logs'>{html_logs}</pre></div>", None, None, progress_html, header_html
-            continue
-    
-    # Wait for the thread to complete
-    agent_thread.join()
-    
-    # Check for any remaining logs
-    while not log_queue.empty():
-        try:
-            log_msg = log_queue.get_nowait()
-            accumulated_logs += log_msg + "\n"
-        except queue.Empty:
-            break
+            # Yield the updated logs, progress, and header, and skip the components that did not change
+            yield (
+                log_renderer.html() if logs_changed else gr.skip(),
+                gr.skip(),
+                gr.skip(),
+                progress_html if progress_html != last_progress_html else gr.skip(),
+                header_html if header_html != last_header_html else gr.skip(),
+            )
+            last_progress_html = progress_html
+            last_header_html = header_html
+    finally:
+        # The client went away, stop annotating for it
+        if not agent_task.done():
+            agent_task.cancel()
+    await agent_task
     
     # Return final results
-    html_logs = converter.convert(accumulated_logs, full=False)
+    html_logs = log_renderer.html()
     final_progress_html = create_progress_bar_html(100, "Complete!", "", progress_container["total_count"], progress_container["total_count"])
     
     if result_container["error"]:
         error_progress_html = create_progress_bar_html(0, f"Error: {result_container['error']}", "", 0, 0)
         error_header_html = create_header_html("idle")
-        yield f"<div class='live-logs-container'><pre class='live-logs'>{html_logs}</pre></div>", None, None, error_progress_html, error_header_html
+        yield html_logs, None, None, error_progress_html, error_header_html
     else:
         final_header_html = create_header_html("celebrating")
-        yield f"<div class='live-logs-container'><pre class='live-logs'>{html_logs}</pre></div>", result_container["ontology_output"], result_container["file_output"], final_progress_html, final_header_html
+        yield html_logs, result_container["ontology_output"], result_container["file_output"], final_progress_html, final_header_html
+
+@contextlib.asynccontextmanager
+async def close_sessions(app):
+    """Lifespan of the Gradio server: close the HTTP sessions opened on its event loop when it stops"""
+    yield
+    await get_http_client().aclose()
+    await close_model_sessions()
 
 def run_interface():
     """ Function to run the agent with a Gradio interface.
@@ -1152,7 +1181,9 @@ def run_interface():
         </div>
         """)
     
-    demo.launch(debug=True)
+    # Load the model while the interface starts, so that the first user does not wait for it
+    warm_up_models()
+    demo.launch(debug=True, app_kwargs={"lifespan": close_sessions})
 
 if __name__ == "__main__":
     run_interface()
\ No newline at end of file
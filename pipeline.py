@@ -0,0 +1,352 @@
+"""
+Annotation pipeline shared by the Gradio app and the batch command.
+"""
+import asyncio
+import contextlib
+import os
+import re
+import threading
+import time
+from tools.format_resolver import find_candidate_formats, pre_resolve_file_format
+from tools.fetch_ontology_tools import EDAM_RELEASE
+from tools.cache_tools import AnswerCache
+from tools.module_meta import FileElement, ModuleMeta
+from agents.query_ontology_db import close_model_sessions, create_agent, model, model_config, small_model_config
+from agents.model_factory import AgentPool
+from agents.cascade import CascadeStats, cascade_available, classify_small_async
+from agents.direct_classifier import build_classification_prompt, classify_file_async, classify_files_async, describe_file
+from tools.llm_usage import get_llm_usage
+
+# Resolve unambiguous files (e.g. "*.html") from the EDAM index before asking the agent
+PRE_RESOLVE = os.environ.get("AGENTONTOLOGY_PRE_RESOLVE", "1") != "0"
+
+# "agent": the files are annotated by the multi-step agent. "direct": the candidate formats are retrieved from the
+# EDAM index and the model picks among them in a single call per file. "batched": same, with a single call for
+# all the files of a module. Files without candidates still go to the agent
+MODE = os.environ.get("AGENTONTOLOGY_MODE", "agent")
+if MODE not in ("agent", "direct", "batched"):
+    raise ValueError(f"Unknown AGENTONTOLOGY_MODE: {MODE}")
+
+# Number of candidate formats listed per file in the prompts of the direct and batched modes
+DIRECT_TOP_K = int(os.environ.get("AGENTONTOLOGY_DIRECT_TOP_K", "10"))
+
+# Maximum number of agents running concurrently in the process (one agent per file)
+MAX_WORKERS = max(1, int(os.environ.get("AGENTONTOLOGY_MAX_WORKERS", "4")))
+
+# Shared by all the modules annotated at the same time, so that batch runs do not overload the LLM server
+_agent_slots = threading.BoundedSemaphore(MAX_WORKERS)
+
+# Agents are reused from one file to the next, at most one per slot
+agent_pool = AgentPool(create_agent, MAX_WORKERS)
+
+# Files resolved on each tier (index, cache, small model, default model), for all requests
+cascade_stats = CascadeStats()
+
+# Persistent cache of the agent answers, shared by all requests
+answer_cache = AnswerCache(
+    max_entries=int(os.environ.get("AGENTONTOLOGY_ANSWER_CACHE_MAX_ENTRIES", "50000")),
+    ttl=float(os.environ.get("AGENTONTOLOGY_ANSWER_CACHE_TTL_DAYS", "30")) * 24 * 3600,
+) if os.environ.get("AGENTONTOLOGY_ANSWER_CACHE", "1") != "0" else None
+
+def extract_format_terms_from_result(result):
+    """Extract EDAM format terms from agent result string"""
+    if isinstance(result, str):
+        # Look for format_XXXX patterns in the result using regex
+        format_matches = re.findall(r"format_\d+", result)
+        return format_matches
+    elif isinstance(result, list):
+        # If it's already a list, filter for format terms
+        return [
+            item for item in result if isinstance(item, str) and item.startswith("format_")
+        ]
+    return []
+
+def collect_file_elements(meta_yml: dict) -> list[FileElement]:
+    """
+    Collect the file inputs and outputs of a module, in meta.yml order.
+
+    Args:
+        meta_yml (dict): The content of the module meta.yml file.
+
+    Returns:
+        list: The file elements, see `ModuleMeta`.
+    """
+    return ModuleMeta(meta_yml).files
+
+# Identical for every file, and sent before the file details, so that the LLM server can reuse the evaluated
+# prefix (agent system prompt, tool descriptions and these instructions) from one run to the next
+AGENT_INSTRUCTIONS = (
+    "You are presented with a file of an nf-core module, described below. Search for the best matches out of "
+    "possible matches in the EDAM ontology (formatted as format_XXXX), and return the answer (a list of ontology "
+    "classes) in a final_answer call such as final_answer([format_XXXX, format_XXXX, ...]). "
+    "For an output, the output channel name can also give you more information."
+)
+
+def build_prompt(element: FileElement) -> str:
+    """
+    Build the agent prompt for a file: the constant instructions, then the file details.
+
+    Args:
+        element (FileElement): The file to annotate.
+
+    Returns:
+        str: The prompt.
+    """
+    return f"{AGENT_INSTRUCTIONS}\n\n{describe_file(element)}"
+
+def run_agent(prompt: str):
+    """
+    Run an agent of the pool on a prompt. The caller holds an agent slot, see `llm_slot`.
+
+    Agents keep the memory of their run and cannot be shared between threads, each run has an agent to itself.
+    """
+    with agent_pool.agent() as agent:
+        return agent.run(prompt)
+
+@contextlib.asynccontextmanager
+async def llm_slot():
+    """Hold an agent slot for an LLM call made from the event loop, without blocking it while waiting."""
+    # Polled rather than acquired in a worker thread, so that a cancelled task can never leak a slot
+    while not _agent_slots.acquire(blocking=False):
+        await asyncio.sleep(0.05)
+    try:
+        yield
+    finally:
+        _agent_slots.release()
+
+async def build_file_prompt(element: FileElement, mode: str = None) -> tuple[str, list[str]]:
+    """
+    Build the prompt of a file for a mode.
+
+    Args:
+        element (FileElement): The file to annotate.
+        mode (str): "agent", "direct" or "batched", see MODE. Defaults to MODE.
+
+    Returns:
+        tuple: The prompt and the candidate format ids. Without candidates, the prompt is for the agent.
+            In batched mode, the prompt is the one of the direct mode, which keys the answer in the cache.
+    """
+    candidates = []
+    if (mode or MODE) in ("direct", "batched"):
+        candidates = await asyncio.to_thread(find_candidate_formats, element.name, element.attributes, DIRECT_TOP_K)
+    if candidates:
+        return build_classification_prompt(element, candidates), candidates
+    return build_prompt(element), []
+
+async def ask_model(prompt: str, candidates: list[str]) -> list[str]:
+    """
+    Find the formats of a file with the model: in a single call if there are candidates, otherwise with the agent.
+
+    Args:
+        prompt (str): The prompt, see `build_file_prompt`.
+        candidates (list): The candidate format ids listed in the prompt.
+
+    Returns:
+        list: The format ids found.
+    """
+    if candidates:
+        async with llm_slot():
+            return await classify_file_async(prompt, candidates)
+    # smolagents has no asynchronous run, the agent runs in a worker thread (which inherits the caller context).
+    # The slot is awaited on the loop, so that files waiting for one do not hold a worker thread
+    async with llm_slot():
+        result = await asyncio.to_thread(run_agent, prompt)
+    # Extract format terms from the agent result
+    return extract_format_terms_from_result(result)
+
+def answer_model_id(candidates: list[str]) -> str:
+    """The id of the model(s) answering a prompt, part of its answer cache key."""
+    if candidates and cascade_available():
+        return f"{small_model_config.cache_id}>{model_config.cache_id}"
+    return model_config.cache_id
+
+async def try_small_model(element: FileElement, prompt: str, candidates: list[str]) -> list[str]:
+    """
+    Ask the small model of the cascade for the formats of a file.
+
+    Args:
+        element (FileElement): The file to annotate.
+        prompt (str): The prompt of the file, see `build_file_prompt`.
+        candidates (list): The candidate format ids listed in the prompt.
+
+    Returns:
+        list: The format ids, or an empty list if the file must be escalated to the default model.
+    """
+    start = time.perf_counter()
+    async with llm_slot():
+        format_terms, reason = await classify_small_async(prompt, candidates)
+    elapsed = time.perf_counter() - start
+    if reason is None:
+        cascade_stats.record("small", elapsed)
+        print(f"Resolved {element.direction} {element.key} with {small_model_config.model_id}: {format_terms}")
+        return format_terms
+    cascade_stats.record_escalation(elapsed)
+    print(f"Escalating {element.direction} {element.key} to {model.model_id}: {reason}")
+    return []
+
+class ClassificationBatch:
+    """
+    The files of a module classified together in a single call, in batched mode.
+
+    Each file either joins the batch with `classify` or leaves it with `leave` (resolved from the index or the cache,
+    or sent to the agent). The request is sent as soon as every file has done one or the other.
+    The instance belongs to one event loop.
+    """
+
+    def __init__(self, size: int):
+        self._pending = size
+        self._items = []
+        self._task = None
+
+    def leave(self):
+        """Record that a file does not need the batch."""
+        self._pending -= 1
+        if self._pending == 0 and self._items:
+            self._task = asyncio.create_task(self._send(self._items))
+
+    async def classify(self, element: FileElement, candidates: list[str]) -> list[str]:
+        """
+        Add a file to the batch and wait for its formats.
+
+        Args:
+            element (FileElement): The file to classify.
+            candidates (list): The candidate format ids of the file.
+
+        Returns:
+            list: The format ids chosen for the file.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._items.append((element, candidates, future))
+        self.leave()
+        return await future
+
+    async def _send(self, items: list[tuple]):
+        try:
+            async with llm_slot():
+                answers = await classify_files_async([(element, candidates) for element, candidates, _ in items])
+        except asyncio.CancelledError:
+            for *_, future in items:
+                future.cancel()
+            raise
+        except Exception as error:
+            for *_, future in items:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        print(f"Classified {len(items)} files in a single call")
+        for (_, _, future), formats in zip(items, answers):
+            if not future.done():
+                future.set_result(formats)
+
+async def annotate_files_async(files: list[FileElement], progress_callback=None) -> dict:
+    """
+    Find the EDAM formats of the given files, annotating all the files concurrently.
+
+    The pipeline runs on the event loop. Only the blocking steps (index and cache lookups, agent runs)
+    are offloaded to worker threads, and at most MAX_WORKERS agents run at the same time in the process.
+
+    Args:
+        files (list): The files to annotate, as returned by `collect_file_elements`.
+        progress_callback (callable): Optional callback receiving (progress, status, current_file, current_count, total_count, animation_state).
+            It is called from the event loop thread.
+
+    Returns:
+        dict: The format terms found, as {"input": {key: [format_XXXX, ...]}, "output": {key: [...]}}, keyed by `FileElement.key`.
+    """
+    results = {"input": {}, "output": {}}
+    total_files = len(files)
+    current_files = 0
+    batch = ClassificationBatch(total_files) if MODE == "batched" else None
+
+    async def annotate_file(element):
+        nonlocal current_files
+        direction, key = element.direction, element.key
+        # Update progress BEFORE processing starts for this file
+        if progress_callback:
+            progress_callback(int((current_files / total_files) * 100), f"Starting analysis of {direction}: {key}", key, current_files, total_files, "rotating")
+
+        format_terms = await asyncio.to_thread(pre_resolve_file_format, element.name, element.attributes) if PRE_RESOLVE else []
+        if format_terms:
+            print(f"Resolved {direction} {key} from the EDAM index without the agent: {format_terms}")
+            cascade_stats.record("index")
+            if batch:
+                batch.leave()
+        else:
+            # The small model needs the candidates in every mode
+            prompt, candidates = await build_file_prompt(element, "direct" if MODE == "agent" and cascade_available() else MODE)
+            cache_key = AnswerCache.make_key(prompt, answer_model_id(candidates), EDAM_RELEASE)
+            cached_terms = await asyncio.to_thread(answer_cache.get, cache_key) if answer_cache else None
+            if cached_terms is not None:
+                print(f"Reusing cached answer for {direction} {key}: {cached_terms}")
+                format_terms = cached_terms
+                cascade_stats.record("cache")
+                if batch:
+                    batch.leave()
+            else:
+                # The small model first, the default model only if its answer cannot be trusted
+                format_terms = await try_small_model(element, prompt, candidates) if candidates and cascade_available() else []
+                if format_terms:
+                    if batch:
+                        batch.leave()
+                else:
+                    start = time.perf_counter()
+                    if batch and candidates:
+                        format_terms = await batch.classify(element, candidates)
+                    else:
+                        if batch:
+                            batch.leave()
+                        # In agent mode, the candidates were only retrieved for the small model
+                        if MODE == "agent":
+                            prompt, candidates = build_prompt(element), []
+                        # This is where the agent runs - logs should be captured automatically
+                        format_terms = await ask_model(prompt, candidates)
+                        if candidates:
+                            print(f"Classified {direction} {key} in a single call among {len(candidates)} candidates: {format_terms}")
+                    cascade_stats.record("default", time.perf_counter() - start)
+                # Empty answers are not cached, they are more likely a failed run than a file without format
+                if format_terms and answer_cache:
+                    await asyncio.to_thread(answer_cache.set, cache_key, format_terms)
+
+        # Update progress AFTER processing completes for this file
+        current_files += 1
+        if progress_callback:
+            progress_callback(int((current_files / total_files) * 100), f"Completed analysis of {direction}: {key}", key, current_files, total_files, "rotating")
+        return format_terms
+
+    # Files are independent, a failure cancels the files still waiting
+    try:
+        async with asyncio.TaskGroup() as group:
+            tasks = [group.create_task(annotate_file(element)) for element in files]
+    except ExceptionGroup as errors:
+        raise errors.exceptions[0]
+
+    # Merge in meta.yml order, independently of the completion order
+    for element, task in zip(files, tasks):
+        results[element.direction][element.key] = task.result()
+
+    if answer_cache:
+        print(f"Answer cache: {answer_cache.stats()}")
+    print(f"LLM usage: {get_llm_usage().stats()}")
+    print(f"Files resolved per tier: {cascade_stats.stats()}")
+
+    return results
+
+def annotate_files(files: list[FileElement], progress_callback=None) -> dict:
+    """
+    Blocking version of `annotate_files_async`, for callers without an event loop (e.g. the batch command).
+
+    Args:
+        files (list): The files to annotate, as returned by `collect_file_elements`.
+        progress_callback (callable): Optional progress callback, see `annotate_files_async`.
+
+    Returns:
+        dict: The format terms found, as {"input": {key: [format_XXXX, ...]}, "output": {key: [...]}}, keyed by `FileElement.key`.
+    """
+    async def annotate():
+        try:
+            return await annotate_files_async(files, progress_callback)
+        finally:
+            # The loop ends with the call, its model sessions would be left open
+            await close_model_sessions()
+
+    return asyncio.run(annotate())
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# The tests run offline, with their own cache directory and without loading any model
+os.environ.setdefault("AGENTONTOLOGY_CACHE_DIR", tempfile.mkdtemp(prefix="agentontology-tests-"))
+os.environ.setdefault("AGENTONTOLOGY_WARM_UP", "0")
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tools.artifact_store import ArtifactStore
+
+
+def test_concurrent_requests_get_their_own_file(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    requests = {
+        ArtifactStore.make_key("fastqc", "name: fastqc\n", {"input": {"reads": ["format_1930"]}}): "reads: fastq\n",
+        ArtifactStore.make_key("fastqc", "name: fastqc\n", {"input": {"reads": ["format_1929"]}}): "reads: fasta\n",
+    }
+    barrier = threading.Barrier(len(requests))
+
+    def store_request(item):
+        key, content = item
+        barrier.wait()
+        return store.put(key, content)
+
+    with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+        paths = list(executor.map(store_request, requests.items()))
+
+    assert paths[0] != paths[1]
+    for path, content in zip(paths, requests.values()):
+        with open(path) as fh:
+            assert fh.read() == content
+
+
+def test_identical_results_are_written_once(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    key = ArtifactStore.make_key("fastqc", "name: fastqc\n", {})
+    path = store.put(key, "first\n")
+    assert store.put(key, "second\n") == path
+    with open(path) as fh:
+        assert fh.read() == "first\n"
+
+
+def test_expired_artifacts_are_removed(tmp_path):
+    store = ArtifactStore(str(tmp_path), ttl=3600)
+    expired = store.put("expired", "old\n")
+    old = time.time() - 7200
+    os.utime(expired, (old, old))
+    # An interrupted write leaves a directory without meta.yml
+    (tmp_path / "interrupted").mkdir()
+    os.utime(tmp_path / "interrupted", (old, old))
+
+    fresh = store.put("fresh", "new\n")
+    assert not os.path.exists(os.path.dirname(expired))
+    assert not (tmp_path / "interrupted").exists()
+    assert store.get("expired") is None
+    assert store.get("fresh") == fresh
+
+
+def test_least_recently_used_artifacts_are_removed_beyond_max_entries(tmp_path):
+    store = ArtifactStore(str(tmp_path), max_entries=2)
+    for age, key in enumerate(["newer", "older"], start=1):
+        path = store.put(key, f"{key}\n")
+        os.utime(path, (time.time() - age * 60, time.time() - age * 60))
+    store.put("newest", "newest\n")
+    assert store.get("older") is None
+    assert store.get("newer") is not None
+    assert store.get("newest") is not None
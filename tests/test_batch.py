@@ -0,0 +1,51 @@
+import os
+import subprocess
+import pytest
+import batch
+from tools.meta_yml_sources import LocalMetaYmlSource
+
+FASTQC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fastqc.yaml")
+
+
+def annotate_all(files):
+    results = {"input": {}, "output": {}}
+    for element in files:
+        results[element.direction][element.key] = ["format_1930"]
+    return results
+
+
+@pytest.fixture
+def crlf_checkout(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch, "annotate_files", annotate_all)
+    module_dir = tmp_path / "modules" / "modules" / "nf-core" / "fastqc"
+    module_dir.mkdir(parents=True)
+    with open(FASTQC) as fh, open(module_dir / "meta.yml", "w", newline="") as out:
+        out.write(fh.read().replace("\n", "\r\n"))
+    return tmp_path / "modules"
+
+
+def only_crlf(content: bytes) -> bool:
+    return b"\n" not in content.replace(b"\r\n", b"")
+
+
+def test_local_source_keeps_crlf(crlf_checkout):
+    assert "\r\n" in LocalMetaYmlSource(str(crlf_checkout)).get_text("fastqc")
+
+
+def test_in_place_keeps_crlf(crlf_checkout):
+    source = LocalMetaYmlSource(str(crlf_checkout))
+    record = batch.annotate_module("fastqc", source, in_place=True)
+    with open(record["output"], "rb") as fh:
+        content = fh.read()
+    assert b"format_1930" in content
+    assert only_crlf(content)
+
+
+def test_patch_applies_to_crlf_files(crlf_checkout, tmp_path):
+    patch = tmp_path / "ontologies.patch"
+    batch.annotate_module("fastqc", LocalMetaYmlSource(str(crlf_checkout)), patch=str(patch))
+    subprocess.run(["git", "apply", str(patch)], cwd=crlf_checkout, check=True)
+    with open(crlf_checkout / "modules" / "nf-core" / "fastqc" / "meta.yml", "rb") as fh:
+        content = fh.read()
+    assert b"format_1930" in content
+    assert only_crlf(content)
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+import pytest
+from tools import cache_tools
+from tools.cache_tools import AnswerCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_tools, "time", SimpleNamespace(time=clock.time))
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return AnswerCache(str(tmp_path / "answers.sqlite3"), max_entries=2, ttl=100)
+
+
+def test_keys_ignore_formatting_but_not_model_or_release():
+    key = AnswerCache.make_key("Input file:  reads\nFASTQ files", "ollama/devstral:latest", "1.25")
+    assert key == AnswerCache.make_key("input file: reads fastq files ", "ollama/devstral:latest", "1.25")
+    assert key != AnswerCache.make_key("Input file: reads FASTQ files", "ollama/qwen3:0.6b", "1.25")
+    assert key != AnswerCache.make_key("Input file: reads FASTQ files", "ollama/devstral:latest", "1.26")
+
+
+def test_hits_and_misses_are_counted(cache):
+    assert cache.get("a") is None
+    cache.set("a", ["format_1930"])
+    assert cache.get("a") == ["format_1930"]
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set("a", ["format_1930"])
+    clock.now += 100
+    assert cache.get("a") == ["format_1930"]
+    # Reading an entry does not extend its lifetime
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache, clock):
+    cache.set("a", ["format_1930"])
+    clock.now += 1
+    cache.set("b", ["format_1929"])
+    clock.now += 1
+    # "a" becomes the most recently used entry
+    assert cache.get("a") == ["format_1930"]
+    clock.now += 1
+    cache.set("c", ["format_2572"])
+    assert cache.get("b") is None
+    assert cache.get("a") == ["format_1930"]
+    assert cache.get("c") == ["format_2572"]
+    assert cache.stats()["entries"] == 2
+
+
+def test_entries_persist_across_instances(tmp_path, clock):
+    path = str(tmp_path / "answers.sqlite3")
+    AnswerCache(path).set("a", ["format_1930"])
+    assert AnswerCache(path).get("a") == ["format_1930"]
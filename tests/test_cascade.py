@@ -0,0 +1,46 @@
+import json
+import pytest
+from agents import cascade
+from tools.edam_index import EdamTerm
+
+TERMS = {
+    "format_1930": EdamTerm("format_1930", ["FASTQ"], [], ["fastq"]),
+    "format_1929": EdamTerm("format_1929", ["FASTA"], [], ["fasta"]),
+    "format_1234": EdamTerm("format_1234", ["Old format"], [], [], obsolete=True),
+    "data_2044": EdamTerm("data_2044", ["Sequence"], [], []),
+}
+CANDIDATES = ["format_1930", "format_1929"]
+
+
+@pytest.fixture(autouse=True)
+def edam_terms(monkeypatch):
+    monkeypatch.setattr("tools.format_resolver.get_edam_terms", lambda: TERMS)
+
+
+def check(answer):
+    return cascade.check_answer(json.dumps(answer), CANDIDATES)
+
+
+def test_confident_valid_answer_is_kept():
+    assert check({"formats": ["format_1930", "format_1930"], "confidence": 0.9}) == (["format_1930"], None)
+
+
+@pytest.mark.parametrize("answer", [
+    {"formats": [{"id": "format_1930"}], "confidence": 0.9},
+    {"formats": [["format_1930"]], "confidence": 0.9},
+    {"formats": [], "confidence": 0.9},
+    {"formats": ["format_1234"], "confidence": 0.9},
+    {"formats": ["data_2044"], "confidence": 0.9},
+    {"formats": ["format_9999"], "confidence": 0.9},
+    {"formats": ["format_1930"], "confidence": 0.2},
+    {"formats": ["format_1930"], "confidence": True},
+    {"formats": ["format_1930"]},
+    {"formats": "format_1930", "confidence": 0.9},
+])
+def test_doubtful_answer_is_escalated(answer):
+    _, reason = check(answer)
+    assert reason is not None
+
+
+def test_invalid_json_is_escalated():
+    assert cascade.check_answer("not json", CANDIDATES)[1] is not None
@@ -0,0 +1,170 @@
+from types import SimpleNamespace
+import pytest
+from tools import fetch_ontology_tools
+from tools.edam_index import EdamIndex, EdamTerm, expand_braces, load_edam_terms, normalize_extension
+
+TERMS = [
+    EdamTerm("format_1930", ["FASTQ"], ["FASTQ short read format"], ["fastq", "fq"], "FASTQ short read format with quality scores."),
+    EdamTerm("format_1929", ["FASTA"], [], ["fasta", "fa"], "FASTA sequence format."),
+    EdamTerm("format_2572", ["BAM"], [], ["bam"], "Binary alignment map."),
+    EdamTerm("format_3462", ["CRAM"], [], ["cram"], "Compressed reference-based alignment map."),
+    EdamTerm("format_3327", ["BAI"], [], ["bai", "bam.bai"], "BAM index."),
+    EdamTerm("format_3989", ["GZIP format"], [], ["gz"], "Compressed with gzip."),
+    EdamTerm("format_2331", ["HTML"], [], ["html"], "Hypertext markup language."),
+    EdamTerm("format_3475", ["TSV"], ["Tabular format"], ["tsv"], "Values separated by tabs, one record per line."),
+    EdamTerm("format_1234", ["Old FASTQ variant"], [], [], "Obsolete FASTQ variant.", obsolete=True),
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return EdamIndex(TERMS)
+
+
+@pytest.mark.parametrize("query, expected", [
+    # Globs and file names go through the extension table
+    ("*.bam", ["format_2572"]),
+    ("fq.gz", ["format_1930"]),
+    # Exact name or extension hits come first, then the terms containing every word, in ontology order
+    ("fastq", ["format_1930", "format_1234"]),
+    ("fast", ["format_1930", "format_1929", "format_1234"]),
+    ("tabular", ["format_3475"]),
+    ("fastq variant", ["format_1234"]),
+    ("unknown words", []),
+])
+def test_search(index, query, expected):
+    assert index.search(query) == expected
+
+
+def test_empty_search_returns_every_term(index):
+    assert index.search("") == [term.id for term in TERMS]
+
+
+@pytest.mark.parametrize("fragment, expected", [
+    ("ast", {"format_1930", "format_1929", "format_1234"}),
+    ("FORMAT_25", {"format_2572"}),
+    ("tabular f", {"format_3475"}),
+    ("zzz", set()),
+])
+def test_substring_matches(index, fragment, expected):
+    assert index.substring_matches(fragment) == expected
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("reads.txt", ["reads.txt"]),
+    ("*.{bam,cram}", ["*.bam", "*.cram"]),
+    ("*_{fastqc.html}", ["*_fastqc.html"]),
+    ("*.{fq,fastq}.{gz,bz2}", ["*.fq.gz", "*.fq.bz2", "*.fastq.gz", "*.fastq.bz2"]),
+])
+def test_expand_braces(pattern, expected):
+    assert expand_braces(pattern) == expected
+
+
+@pytest.mark.parametrize("extension, expected", [("*.HTML", "html"), (".bam", "bam"), (" fq ", "fq")])
+def test_normalize_extension(extension, expected):
+    assert normalize_extension(extension) == expected
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("*.bam", ["format_2572"]),
+    ("*.{bam,cram}", ["format_2572", "format_3462"]),
+    # The longest known extension wins
+    ("*.bam.bai", ["format_3327"]),
+    # A compressed file has the format of the file it wraps
+    ("*.fastq.gz", ["format_1930"]),
+    ("'out/*.fq.gz'", ["format_1930"]),
+    # Unless the wrapped extension is unknown
+    ("*.tar.gz", ["format_3989"]),
+    ("*_fastqc.HTML", ["format_2331"]),
+    ("*.xyz", []),
+    ("reads", []),
+])
+def test_resolve_pattern(index, pattern, expected):
+    assert index.resolve_pattern(pattern) == expected
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("fastq", ["format_1930"]),
+    (" Tabular Format ", ["format_3475"]),
+    ("fq", []),
+])
+def test_lookup_name(index, name, expected):
+    assert index.lookup_name(name) == expected
+
+
+@pytest.mark.parametrize("extension, expected", [
+    ("fq", ["format_1930"]),
+    ("*.BAM", ["format_2572"]),
+    (".bam.bai", ["format_3327"]),
+    ("fastq-like", []),
+])
+def test_lookup_extension(index, extension, expected):
+    assert index.lookup_extension(extension) == expected
+
+
+class FakeClass:
+    """The owlready2 class attributes read by load_edam_terms."""
+
+    def __init__(self, name, parents=(), **annotations):
+        self.name = name
+        self.is_a = [FakeClass(parent) for parent in parents]
+        for annotation, values in annotations.items():
+            setattr(self, annotation, values)
+
+
+def test_load_edam_terms_reads_every_edam_class():
+    classes = [
+        FakeClass("format_1930", ["format_2330"], label=["FASTQ"], hasExactSynonym=["FASTQ format"], file_extension=["fq"], hasDefinition=["FASTQ reads."]),
+        FakeClass("format_1234", label=["Old format"], deprecated=[True]),
+        FakeClass("data_2044", label=["Sequence"]),
+        FakeClass("Thing"),
+    ]
+    terms = load_edam_terms(SimpleNamespace(classes=lambda: classes))
+    assert [term.id for term in terms] == ["format_1930", "format_1234", "data_2044"]
+    assert terms[0].details() == {
+        "label": "FASTQ",
+        "definition": "FASTQ reads.",
+        "comment": "",
+        "synonyms": ["FASTQ format"],
+        "parents": ["format_2330"],
+        "obsolete": False,
+    }
+    assert terms[0].extensions == ["fq"]
+    assert terms[1].obsolete
+
+
+def test_term_details_are_returned_in_bulk(monkeypatch):
+    monkeypatch.setattr(fetch_ontology_tools, "get_edam_terms", lambda: {term.id: term for term in TERMS})
+    details = fetch_ontology_tools.get_edam_term_details(["format_1930", " format_1234", "format_9999"])
+    assert details["format_1930"]["label"] == "FASTQ"
+    assert details[" format_1234"]["obsolete"]
+    assert details["format_9999"] is None
+
+
+@pytest.mark.parametrize("query, best", [
+    ("FASTQ", "format_1930"),
+    ("*.cram", "format_3462"),
+    # Only in the definition, found by BM25 alone
+    ("separated by tabs", "format_3475"),
+    ("alignment map", "format_2572"),
+])
+def test_rank_puts_the_best_match_first(index, query, best):
+    assert index.rank(query)[0][0] == best
+
+
+def test_rank_boosts_direct_hits_and_ranks_obsolete_terms_down(index):
+    scores = dict(index.rank("fastq"))
+    assert scores["format_1930"] >= EdamIndex.DIRECT_BOOST
+    assert scores["format_1234"] < scores["format_1930"]
+
+
+def test_rank_returns_at_most_top_k(index):
+    assert len(index.rank("format", top_k=2)) <= 2
+    assert index.rank("", top_k=3) == [(term.id, 0.0) for term in TERMS[:3]]
+
+
+def test_bm25_scores_only_matching_terms(index):
+    assert index.bm25_scores(["zzz"]) == {}
+    scores = index.bm25_scores(["alignment"])
+    assert set(scores) == {"format_2572", "format_3462"}
+    assert all(score > 0 for score in scores.values())
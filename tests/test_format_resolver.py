@@ -0,0 +1,34 @@
+import pytest
+from tools.edam_index import EdamIndex, EdamTerm
+from tools.format_resolver import pre_resolve_file_format
+
+
+@pytest.fixture
+def index():
+    return EdamIndex([
+        EdamTerm("format_1915", ["Format"]),
+        EdamTerm("format_2330", ["Textual format"], ["Plain text format"], ["txt"], parents=["format_1915"]),
+        EdamTerm("format_3475", ["TSV"], ["Tabular format"], ["tsv"], parents=["format_2330"]),
+        EdamTerm("format_1930", ["FASTQ"], [], ["fastq", "fq"], parents=["format_2330"]),
+        EdamTerm("format_1234", ["Old FASTQ"], ["fastx"], ["fastx"], obsolete=True),
+    ])
+
+
+def test_description_naming_one_format_is_resolved(index):
+    element = {"type": "file", "description": "Trimmed reads in FASTQ"}
+    assert pre_resolve_file_format("reads", element, index) == ["format_1930"]
+
+
+def test_generic_words_do_not_resolve_to_the_root_format(index):
+    element = {"type": "file", "description": "Table in a format readable by R"}
+    assert pre_resolve_file_format("table", element, index) == []
+
+
+def test_generic_words_are_ignored_next_to_a_format(index):
+    element = {"type": "file", "description": "FASTQ file, in a text format"}
+    assert pre_resolve_file_format("reads", element, index) == ["format_1930"]
+
+
+def test_obsolete_formats_are_not_resolved(index):
+    assert pre_resolve_file_format("reads", {"type": "file", "pattern": "*.fastx"}, index) == []
+    assert pre_resolve_file_format("reads", {"type": "file", "description": "Reads in fastx"}, index) == []
@@ -0,0 +1,28 @@
+import asyncio
+import aiohttp
+import pytest
+from tools.http_client import CachedHttpClient
+
+
+class TimingOutSession:
+    def get(self, url, headers=None):
+        raise asyncio.TimeoutError()
+
+
+def test_async_timeout_is_reported_as_a_client_error(monkeypatch):
+    client = CachedHttpClient(retries=1, backoff_factor=0)
+    monkeypatch.setattr(client, "_async_session", TimingOutSession)
+    with pytest.raises(aiohttp.ClientError, match="https://example.org/meta.yml"):
+        asyncio.run(client.get_text_async("https://example.org/meta.yml"))
+
+
+def test_aclose_closes_the_session_of_the_loop():
+    client = CachedHttpClient()
+
+    async def open_and_close():
+        session = client._async_session()
+        await client.aclose()
+        return session
+
+    assert asyncio.run(open_and_close()).closed
+    assert not client._async_sessions
@@ -0,0 +1,46 @@
+import sys
+import pytest
+
+uvicorn = pytest.importorskip("uvicorn")
+pytest.importorskip("gradio")
+
+
+@pytest.fixture
+def main_module():
+    stdout, stderr = sys.stdout, sys.stderr
+    try:
+        import main
+        yield main
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+
+
+def test_queue_writer_passes_stream_attributes_through(main_module):
+    writer = main_module.QueueWriter(sys.__stdout__)
+    assert writer.isatty() == sys.__stdout__.isatty()
+    assert writer.fileno() == sys.__stdout__.fileno()
+    assert writer.encoding == sys.__stdout__.encoding
+
+
+def test_uvicorn_config_with_queue_writer_installed(main_module):
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = main_module.QueueWriter(sys.__stdout__)
+    sys.stderr = main_module.QueueWriter(sys.__stderr__)
+    try:
+        # Gradio's launch() builds the same config, its log formatters call sys.stdout.isatty()
+        config = uvicorn.Config(app=lambda scope, receive, send: None)
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+    assert config.log_config is not None
+
+
+def test_log_colours_carry_over_lines(main_module):
+    renderer = main_module.LogRenderer()
+    renderer.append("\x1b[31mred\nstill red\x1b[0m plain\nplain\n\x1b[1;32mbold")
+    red, still_red, plain, bold = renderer.lines[0], renderer.lines[1], renderer.lines[2], renderer.html()
+    assert 'class="ansi31"' in red
+    assert '<span class="ansi31">still red</span> plain' in still_red
+    assert plain == "plain"
+    assert "ansi32" in bold
+    # Closed at the end of each line, the HTML stays balanced
+    assert all(line.count("<span") == line.count("</span>") for line in renderer.lines)
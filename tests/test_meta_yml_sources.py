@@ -0,0 +1,68 @@
+import os
+import shutil
+import tarfile
+import pytest
+from tools.meta_yml_sources import GitHubMetaYmlSource, LocalMetaYmlSource, MetaYmlSource, TarballMetaYmlSource
+
+FASTQC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fastqc.yaml")
+
+
+@pytest.fixture
+def checkout(tmp_path):
+    module_dir = tmp_path / "modules" / "modules" / "nf-core" / "fastqc"
+    module_dir.mkdir(parents=True)
+    shutil.copy(FASTQC, module_dir / "meta.yml")
+    return tmp_path / "modules"
+
+
+@pytest.fixture
+def tarball(checkout, tmp_path):
+    path = tmp_path / "modules.tar.gz"
+    with tarfile.open(path, "w:gz") as tar:
+        tar.add(checkout, arcname="modules-master")
+    return path
+
+
+def read_fixture():
+    with open(FASTQC) as fh:
+        return fh.read()
+
+
+@pytest.mark.parametrize("source_type", ["checkout", "tarball"])
+def test_offline_sources_read_the_meta_yml(request, source_type):
+    location = request.getfixturevalue(source_type)
+    source = LocalMetaYmlSource(str(location)) if source_type == "checkout" else TarballMetaYmlSource(str(location))
+    assert source.list_modules() == ["fastqc"]
+    assert source.get_text("fastqc") == read_fixture()
+    meta = source.get("fastqc")
+    assert meta["name"] == "fastqc"
+    # The cached content is not shared with the callers
+    meta["name"] = "changed"
+    assert source.get("fastqc")["name"] == "fastqc"
+    with pytest.raises(RuntimeError):
+        source.get("missing")
+
+
+def test_tarball_is_read_again_when_it_changes(tarball, tmp_path):
+    source = TarballMetaYmlSource(str(tarball))
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    with tarfile.open(tarball, "w:gz") as tar:
+        tar.add(empty, arcname="modules-master")
+    os.utime(tarball, (0, 0))
+    with pytest.raises(RuntimeError):
+        source.get_text("fastqc")
+
+
+def test_github_source_cannot_list_modules():
+    with pytest.raises(ValueError):
+        GitHubMetaYmlSource().list_modules()
+
+
+def test_sources_implement_every_method():
+    class Incomplete(MetaYmlSource):
+        def get(self, module_name):
+            return {}
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,25 @@
+import os
+import yaml
+from tools.meta_yml_tools import update_meta_yml
+
+FASTQC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fastqc.yaml")
+
+
+def load_fixture():
+    with open(FASTQC) as fh:
+        return yaml.safe_load(fh)
+
+
+def test_ontologies_are_added_once():
+    meta_yml = load_fixture()
+    update_meta_yml({"reads": ["format_1930"]}, {}, meta_yml)
+    update_meta_yml({"reads": ["format_1930"]}, {}, meta_yml)
+    reads = meta_yml["input"][0][1]["reads"]
+    assert reads["ontologies"].count({"edam": "http://edamontology.org/format_1930"}) == 1
+
+
+def test_empty_ontologies_key_is_filled():
+    meta_yml = load_fixture()
+    meta_yml["input"][0][1]["reads"]["ontologies"] = None
+    update_meta_yml({"reads": ["format_1930"]}, {}, meta_yml)
+    assert meta_yml["input"][0][1]["reads"]["ontologies"] == [{"edam": "http://edamontology.org/format_1930"}]
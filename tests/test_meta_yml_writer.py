@@ -0,0 +1,46 @@
+import os
+import re
+import yaml
+import pytest
+from tools.meta_yml_writer import patch_meta_yml
+from tools.module_meta import ModuleMeta
+
+FASTQC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "fastqc.yaml")
+
+EMPTY_ONTOLOGIES = """input:
+  - - reads:
+        type: file
+        ontologies: # to fill
+  - - index:
+        type: file
+        ontologies: []
+"""
+
+
+def read_fixture():
+    with open(FASTQC, newline="") as fh:
+        return fh.read()
+
+
+def annotate_all(text):
+    module_meta = ModuleMeta(yaml.safe_load(text))
+    ontologies = {"input": {}, "output": {}}
+    for element in module_meta.files:
+        ontologies[element.direction][element.key] = ["format_1930", "format_3464"]
+    return patch_meta_yml(text, module_meta.annotations(ontologies["input"], ontologies["output"]))
+
+
+@pytest.mark.parametrize("text", [read_fixture(), EMPTY_ONTOLOGIES])
+def test_patch_only_adds_lines(text):
+    patched = annotate_all(text)
+    assert patched != text
+    added = [line for line in patched.splitlines() if line not in text.splitlines()]
+    assert all(re.fullmatch(r'\s*(- edam: "http://edamontology.org/format_\d+"|ontologies:.*)', line) for line in added)
+
+
+@pytest.mark.parametrize("text", [read_fixture(), EMPTY_ONTOLOGIES])
+def test_crlf_files_keep_their_newlines(text):
+    crlf = text.replace("\n", "\r\n")
+    patched = annotate_all(crlf)
+    assert "\n" not in patched.replace("\r\n", "")
+    assert patched == annotate_all(text).replace("\n", "\r\n")
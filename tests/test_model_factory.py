@@ -0,0 +1,39 @@
+import asyncio
+from types import SimpleNamespace
+from agents.model_factory import AgentPool, ModelConfig, ModelSessions
+
+
+def test_async_client_is_closed_with_its_loop():
+    sessions = ModelSessions(ModelConfig(backend="llamacpp", model="test"))
+
+    async def call_and_close():
+        client = sessions.async_client()
+        assert sessions.async_client() is client
+        await sessions.aclose()
+        return client
+
+    client = asyncio.run(call_and_close())
+    assert client.is_closed()
+    assert not sessions._async_clients
+
+
+def test_pooled_agents_start_with_a_clean_executor():
+    def factory():
+        return SimpleNamespace(python_executor=SimpleNamespace(state={"__name__": "__main__"}, custom_tools={}))
+
+    pool = AgentPool(factory, 1)
+    with pool.agent() as agent:
+        agent.python_executor.state["reads"] = ["format_1930"]
+        agent.python_executor.custom_tools["helper"] = print
+    with pool.agent() as reused:
+        assert reused is agent
+        assert reused.python_executor.state == {"__name__": "__main__"}
+        assert reused.python_executor.custom_tools == {}
+
+
+def test_cache_id_does_not_depend_on_the_litellm_provider():
+    config = ModelConfig(backend="ollama", model="devstral:latest")
+    assert config.model_id == "ollama_chat/devstral:latest"
+    # The model id of the answer cache keys written before the ollama_chat provider
+    assert config.cache_id == "ollama/devstral:latest"
+    assert ModelConfig(backend="llamacpp", model="devstral:latest").cache_id != config.cache_id
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import pytest
+import pipeline
+from agents.model_factory import AgentPool
+
+MODULES = 3
+
+
+class RunTracker:
+    """Counts the agent runs in progress. Runs block until `release` is set."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+        self.runs = 0
+        self.release = threading.Event()
+        self.changed = threading.Condition()
+
+    def run(self, prompt):
+        with self.changed:
+            self.running += 1
+            self.runs += 1
+            self.peak = max(self.peak, self.running)
+            self.changed.notify_all()
+        self.release.wait(timeout=10)
+        with self.changed:
+            self.running -= 1
+        return ["format_1930"]
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = RunTracker()
+    # More agents than slots, so that only the slots bound the runs
+    pool = AgentPool(lambda: tracker, MODULES * pipeline.MAX_WORKERS)
+    monkeypatch.setattr(pipeline, "agent_pool", pool)
+    return tracker
+
+
+def test_agent_runs_are_bounded_across_modules(tracker):
+    async def annotate_module():
+        return await asyncio.gather(*(pipeline.ask_model("prompt", []) for _ in range(pipeline.MAX_WORKERS)))
+
+    # One event loop per module, as in batch runs
+    modules = [threading.Thread(target=asyncio.run, args=(annotate_module(),)) for _ in range(MODULES)]
+    for module in modules:
+        module.start()
+    try:
+        with tracker.changed:
+            assert tracker.changed.wait_for(lambda: tracker.running == pipeline.MAX_WORKERS, timeout=10)
+        # Every slot is held by a blocked run, the other files wait for one
+        free_slot = pipeline._agent_slots.acquire(blocking=False)
+        if free_slot:
+            pipeline._agent_slots.release()
+        assert not free_slot
+    finally:
+        tracker.release.set()
+        for module in modules:
+            module.join()
+    assert tracker.peak == pipeline.MAX_WORKERS
+    assert tracker.runs == MODULES * pipeline.MAX_WORKERS
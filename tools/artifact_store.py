@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+class ArtifactStore:
+    """
+    Content-addressed store of the updated meta.yml files handed out for download.
+
+    Each artifact lives in its own directory, named after a hash of the module, its original meta.yml content
+    and the ontology results, so concurrent requests never overwrite each other's file and identical results
+    are written once and served from the store afterwards.
+    Artifacts not used for `ttl` seconds are removed, as are the least recently used ones beyond `max_entries`.
+    The instance can be shared between threads.
+    """
+
+    def __init__(self, root: str = None, max_entries: int = 256, ttl: float = 24 * 3600):
+        # Under the temporary directory by default, where Gradio is allowed to serve files from
+        self.root = Path(root or os.path.join(tempfile.gettempdir(), "agentontology-artifacts"))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(module_name: str, meta_yml: str, results: dict) -> str:
+        """
+        Build the key of an artifact.
+
+        Args:
+            module_name (str): The module name.
+            meta_yml (str): The original meta.yml file content, before the ontologies are added.
+            results (dict): The ontology results, as returned by `annotate_files`.
+
+        Returns:
+            str: The artifact key.
+        """
+        payload = json.dumps([module_name, meta_yml, results], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> str:
+        """
+        Return the path of a stored artifact.
+
+        Args:
+            key (str): The artifact key, see `make_key`.
+
+        Returns:
+            str: The path to the meta.yml file, or None if it is not in the store.
+        """
+        path = self.root / key / "meta.yml"
+        try:
+            # The modification time records the last use, for the cleanup
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return str(path)
+
+    def put(self, key: str, meta_yml: str) -> str:
+        """
+        Write a meta.yml file into the store, unless an artifact with the same key exists.
+
+        Args:
+            key (str): The artifact key, see `make_key`.
+            meta_yml (str): The updated meta.yml file content.
+
+        Returns:
+            str: The path to the stored meta.yml file.
+        """
+        path = self.get(key)
+        if path is not None:
+            return path
+
+        artifact_dir = self.root / key
+        artifact_dir.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=artifact_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", newline="") as fh:
+                fh.write(meta_yml)
+            os.chmod(tmp_path, 0o644)
+            # Atomic, a concurrent request with the same key sees either no file or the complete one
+            os.replace(tmp_path, artifact_dir / "meta.yml")
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.cleanup(keep=key)
+        return str(artifact_dir / "meta.yml")
+
+    def cleanup(self, keep: str = None):
+        """
+        Remove the expired artifacts and the least recently used ones beyond `max_entries`.
+
+        Args:
+            keep (str): The key of an artifact that must not be removed (e.g. the one just stored).
+        """
+        now = time.time()
+        with self._lock:
+            entries = []
+            for artifact_dir in self.root.iterdir():
+                try:
+                    entries.append((os.stat(artifact_dir / "meta.yml").st_mtime, artifact_dir))
+                except FileNotFoundError:
+                    # Being written by another request, or left over by an interrupted one
+                    if now - os.stat(artifact_dir).st_mtime > self.ttl:
+                        shutil.rmtree(artifact_dir, ignore_errors=True)
+            entries.sort(reverse=True)
+            for rank, (mtime, artifact_dir) in enumerate(entries):
+                if artifact_dir.name != keep and (rank >= self.max_entries or now - mtime > self.ttl):
+                    shutil.rmtree(artifact_dir, ignore_errors=True)
+
+
+_artifact_store = None
+_artifact_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """
+    Return the process-wide artifact store.
+
+    It is configured with the AGENTONTOLOGY_ARTIFACTS_DIR, AGENTONTOLOGY_ARTIFACTS_MAX_ENTRIES (default: 256)
+    and AGENTONTOLOGY_ARTIFACTS_TTL_HOURS (default: 24) environment variables.
+
+    Returns:
+        ArtifactStore: The shared artifact store.
+    """
+    global _artifact_store
+    if _artifact_store is None:
+        with _artifact_store_lock:
+            if _artifact_store is None:
+                _artifact_store = ArtifactStore(
+                    root=os.environ.get("AGENTONTOLOGY_ARTIFACTS_DIR"),
+                    max_entries=int(os.environ.get("AGENTONTOLOGY_ARTIFACTS_MAX_ENTRIES", "256")),
+                    ttl=float(os.environ.get("AGENTONTOLOGY_ARTIFACTS_TTL_HOURS", "24")) * 3600,
+                )
+    return _artifact_store
@@ -1,9 +1,33 @@
-import json
 import requests
 import logging
+from tools.http_client import get_http_client
+from tools.biotools_mirror import extract_biotools_formats, get_biotools_mirror
 
 logger = logging.getLogger(__name__)
 
+def search_biotools(tool_name: str) -> list[dict]:
+    """
+    Search bio.tools for a tool name.
+
+    When a bio.tools dump is configured (AGENTONTOLOGY_BIOTOOLS_DUMP), the search is answered by the offline mirror.
+    Otherwise the response is fetched through the shared HTTP client and its parsed payload is cached,
+    so the tools below reuse the same download for the same tool name.
+
+    Args:
+        tool_name (str): The name of the tool to search for.
+
+    Returns:
+        list: The bio.tools entries matching the name.
+
+    Raises:
+        requests.exceptions.RequestException: If bio.tools cannot be reached.
+    """
+    mirror = get_biotools_mirror()
+    if mirror is not None:
+        return mirror.lookup(tool_name)
+    url = f"https://bio.tools/api/t/?q={tool_name}&format=json"
+    return get_http_client().get_json(url).get("list", [])
+
 def get_biotools_response(tool_name: str) -> list:
     """
     Try to get bio.tools information for a tool.
@@ -14,15 +38,8 @@ def get_biotools_response(tool_name: str) -> list:
     Returns:
         list: A list with all the entries in biotools associated to the name of the tool and its description.
     """
-    url = f"https://bio.tools/api/t/?q={tool_name}&format=json"
     try:
-        # Send a GET request to the API
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for bad status codes
-        # Parse the JSON response
-        data = response.text
-        data = json.loads(data)
-        data_list = data.get("list", [])
+        data_list = search_biotools(tool_name)
         tool_info = [(tool.get("name"), tool.get("description", "")) for tool in data_list]
 
         for name, desc in tool_info:
@@ -35,55 +52,44 @@ def get_biotools_response(tool_name: str) -> list:
         logger.error(f"Could not find bio.tools information for '{tool_name}': {e}")
         return f"Could not find bio.tools information for '{tool_name}': {e}"
 
-def get_biotools_ontology(tool_name, entry_id:str) -> str:
+def get_biotools_ontology(tool_name, entry_id:str) -> dict:
     """
-    Given a specific entry of the tools list associated to the module, return the biotools input ontology ID. 
+    Given a specific entry of the tools list associated to the module, return the EDAM formats of its inputs and outputs. 
+
+    When a bio.tools dump is configured, the entry is looked up by name or biotools ID (e.g. "biotools:fastqc")
+    in the offline mirror, without network access.
 
     Args:
-        biotools_id (str): The biotools ID to get the ontology ID for (selected by the agent from the list of tools)
+        tool_name (str): The name of the tool the entries were searched for.
+        entry_id (str): The name of the entry (selected by the agent from the list of tools) or its biotools ID.
 
     Returns:
-        str: The biotools ontology ID in the format "biotools:<tool_name>".
+        dict: The EDAM formats used by the entry, as {"input": [(term, uri), ...], "output": [(term, uri), ...]}.
     """
 
-    url = f"https://bio.tools/api/t/?q={tool_name}&format=json"
     try:
-        # Send a GET request to the API
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for bad status codes
-        # Parse the JSON response
-        data = response.text
-        data = json.loads(data)
-        data_list = data.get("list", [])
-
-        found = False
-
-        for tool in data_list:
-            # Select the tool with the given entry_id
-            if tool.get("name") == entry_id:
-                found = True
-                tool_function = tool.get("function")
-
-                format_terms = []
-
-                for fn in tool_function:
-                    for inp in fn.get("input", []):
-                        for fmt in inp.get("format", []):
-                            term = fmt.get("term", "Unknown")
-                            uri = fmt.get("uri", "No URI")
-                            format_terms.append((term, uri))
-                text_block = "List of EDAM formats used:\n"
-
-                for i, (term, uri) in enumerate(format_terms, start=1):
-                    text_block += f"{i}. {term} ({uri})\n"
-
-                logger.info(text_block)
-                return format_terms
-
-        if not found:
+        mirror = get_biotools_mirror()
+        if mirror is not None:
+            format_terms = mirror.get_formats(entry_id)
+        else:
+            format_terms = None
+            for tool in search_biotools(tool_name):
+                # Select the tool with the given entry_id
+                if tool.get("name") == entry_id or f"biotools:{tool.get('biotoolsID')}" == entry_id:
+                    format_terms = extract_biotools_formats(tool)
+                    break
+
+        if format_terms is None:
             logger.error(f"Could not find the entry '{entry_id}' for the tool {tool_name}")
             return f"Could not find the entry '{entry_id}' for the tool {tool_name}"
+
+        for direction in ("input", "output"):
+            text_block = f"List of EDAM formats used for {direction}:\n"
+            for i, (term, uri) in enumerate(format_terms[direction], start=1):
+                text_block += f"{i}. {term} ({uri})\n"
+            logger.info(text_block)
+        return format_terms
     
     except requests.exceptions.RequestException as e:
         logger.error(f"Could not find the entry '{entry_id}' for the tool {tool_name}")
-        return f"Could not find bio.tools information for '{tool_name}': {e}"
\ No newline at end of file
+        return f"Could not find bio.tools information for '{tool_name}': {e}"
@@ -0,0 +1,128 @@
+import json
+import os
+import threading
+from collections import defaultdict
+
+
+def extract_biotools_formats(tool: dict) -> dict:
+    """
+    Extract the EDAM formats of the inputs and outputs of all the functions of a bio.tools entry.
+
+    Args:
+        tool (dict): The bio.tools entry.
+
+    Returns:
+        dict: {"input": [(term, uri), ...], "output": [(term, uri), ...]}, without duplicates.
+    """
+    formats = {"input": [], "output": []}
+    for fn in tool.get("function") or []:
+        for direction in formats:
+            for data in fn.get(direction) or []:
+                for fmt in data.get("format") or []:
+                    term = (fmt.get("term", "Unknown"), fmt.get("uri", "No URI"))
+                    if term not in formats[direction]:
+                        formats[direction].append(term)
+    return formats
+
+
+class BiotoolsMirror:
+    """
+    Offline index of a bio.tools JSON dump.
+
+    Entries are indexed by lowercase biotoolsID and lowercase name, and the input and output
+    EDAM formats of every entry are precomputed, so lookups need no network access.
+    """
+
+    def __init__(self, tools: list[dict]):
+        self.by_id = {}
+        self.by_name = defaultdict(list)
+        self.formats = {}
+        for tool in tools:
+            biotools_id = (tool.get("biotoolsID") or tool.get("name") or "").lower()
+            if not biotools_id:
+                continue
+            self.by_id[biotools_id] = tool
+            self.by_name[(tool.get("name") or "").lower()].append(tool)
+            self.formats[biotools_id] = extract_biotools_formats(tool)
+
+    @classmethod
+    def from_dump(cls, path: str) -> "BiotoolsMirror":
+        """
+        Load a bio.tools dump.
+
+        Args:
+            path (str): Either a JSON file holding a list of entries (or an API page with a "list" key),
+                        or a directory of *.json entries such as the bio.tools content repository.
+
+        Returns:
+            BiotoolsMirror: The index of the dump.
+        """
+        tools = []
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                for filename in filenames:
+                    if filename.endswith(".json"):
+                        with open(os.path.join(dirpath, filename)) as fh:
+                            tools.extend(cls._entries(json.load(fh)))
+        else:
+            with open(path) as fh:
+                tools.extend(cls._entries(json.load(fh)))
+        return cls(tools)
+
+    @staticmethod
+    def _entries(data) -> list[dict]:
+        if isinstance(data, dict):
+            return data["list"] if "list" in data else [data]
+        return data
+
+    def lookup(self, name_or_id: str) -> list[dict]:
+        """
+        Return the entries for a biotools id (e.g. "biotools:fastqc" or "fastqc") or a tool name, case insensitive.
+
+        Args:
+            name_or_id (str): The biotools id or tool name.
+
+        Returns:
+            list: The matching entries, the entry with that id first.
+        """
+        key = name_or_id.strip().lower().removeprefix("biotools:")
+        entries = [self.by_id[key]] if key in self.by_id else []
+        return entries + [tool for tool in self.by_name.get(key, []) if tool not in entries]
+
+    def get_formats(self, name_or_id: str) -> dict:
+        """
+        Return the input and output EDAM formats of an entry.
+
+        Args:
+            name_or_id (str): The biotools id or tool name.
+
+        Returns:
+            dict: {"input": [(term, uri), ...], "output": [(term, uri), ...]}, or None if the entry is unknown.
+        """
+        entries = self.lookup(name_or_id)
+        if not entries:
+            return None
+        return self.formats[(entries[0].get("biotoolsID") or entries[0].get("name")).lower()]
+
+
+_biotools_mirror = None
+_biotools_mirror_lock = threading.Lock()
+
+
+def get_biotools_mirror() -> BiotoolsMirror:
+    """
+    Return the process-wide bio.tools mirror, loaded from the dump set with the
+    AGENTONTOLOGY_BIOTOOLS_DUMP environment variable.
+
+    Returns:
+        BiotoolsMirror: The mirror, or None if no dump is configured.
+    """
+    global _biotools_mirror
+    dump_path = os.environ.get("AGENTONTOLOGY_BIOTOOLS_DUMP")
+    if not dump_path:
+        return None
+    if _biotools_mirror is None:
+        with _biotools_mirror_lock:
+            if _biotools_mirror is None:
+                _biotools_mirror = BiotoolsMirror.from_dump(dump_path)
+    return _biotools_mirror
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+def get_cache_dir(*subdirs: str) -> Path:
+    """
+    Return the local cache directory used by agent ontology, creating it if needed.
+
+    The location can be overridden with the AGENTONTOLOGY_CACHE_DIR environment variable,
+    otherwise it defaults to ~/.cache/agentontology.
+
+    Args:
+        *subdirs (str): Optional sub-directories to append to the cache directory.
+
+    Returns:
+        Path: The path to the (existing) cache directory.
+    """
+    base = os.environ.get("AGENTONTOLOGY_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "agentontology")
+    cache_dir = Path(base, *subdirs)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+
+class AnswerCache:
+    """
+    Persistent SQLite cache of the EDAM formats found by the agent for a prompt.
+
+    Entries are keyed by the normalized prompt, the model id and the EDAM release, expire after `ttl` seconds,
+    and the least recently used entries are evicted once the cache holds more than `max_entries` answers.
+    The instance can be shared between threads.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = 50000, ttl: float = 30 * 24 * 3600):
+        self.path = path or str(get_cache_dir() / "answers.sqlite3")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, formats TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS answers_accessed_at ON answers (accessed_at)")
+
+    @staticmethod
+    def make_key(prompt: str, model_id: str, edam_release: str) -> str:
+        """
+        Build the cache key of a prompt.
+
+        The prompt is normalized (case and whitespace) so that descriptions differing only by
+        their YAML formatting share the same entry.
+
+        Args:
+            prompt (str): The prompt sent to the agent.
+            model_id (str): The id of the model answering the prompt.
+            edam_release (str): The EDAM release the answer refers to.
+
+        Returns:
+            str: The cache key.
+        """
+        normalized = re.sub(r"\s+", " ", prompt).strip().lower()
+        return hashlib.sha256("\x1f".join([normalized, model_id, edam_release]).encode()).hexdigest()
+
+    def get(self, key: str) -> list[str]:
+        """
+        Return the cached EDAM formats for a key.
+
+        Args:
+            key (str): The cache key, see `make_key`.
+
+        Returns:
+            list: The cached format ids, or None if the key is missing or expired.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT formats, created_at FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE answers SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, formats: list[str]):
+        """
+        Store the EDAM formats for a key, evicting the least recently used entries if the cache is full.
+
+        Args:
+            key (str): The cache key, see `make_key`.
+            formats (list): The format ids to store.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, formats, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(formats), now, now),
+            )
+            self._conn.execute(
+                "DELETE FROM answers WHERE key IN (SELECT key FROM answers ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of the lookups of this process served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> dict:
+        """
+        Return the cache statistics.
+
+        Returns:
+            dict: The number of entries, hits, misses and the hit rate.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        return {"entries": entries, "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
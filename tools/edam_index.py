@@ -0,0 +1,381 @@
+import math
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_EDAM_ID_RE = re.compile(r"^(format|data|operation|topic)_\d+$")
+_BRACES_RE = re.compile(r"\{([^{}]*)\}")
+
+# Compression extensions wrapping the actual file format, e.g. "reads.fastq.gz"
+COMPRESSION_EXTENSIONS = {"gz", "bgz", "bz2", "xz", "zst"}
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Split a text into lowercase alphanumeric tokens.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        list: The list of tokens, in order of appearance.
+    """
+    return _TOKEN_RE.findall(text.lower())
+
+
+def expand_braces(pattern: str) -> list[str]:
+    """
+    Expand the shell-like brace alternatives of a glob pattern.
+
+    Args:
+        pattern (str): A glob pattern, for example "*.{bam,cram}" or "*_{fastqc.html}".
+
+    Returns:
+        list: The patterns without braces, for example ["*.bam", "*.cram"].
+    """
+    match = _BRACES_RE.search(pattern)
+    if not match:
+        return [pattern]
+    expanded = []
+    for alternative in match.group(1).split(","):
+        expanded.extend(expand_braces(pattern[:match.start()] + alternative + pattern[match.end():]))
+    return expanded
+
+
+def normalize_extension(extension: str) -> str:
+    """
+    Normalize a file extension or a simple glob to a bare lowercase extension ("*.HTML" -> "html").
+
+    Args:
+        extension (str): The extension to normalize.
+
+    Returns:
+        str: The normalized extension.
+    """
+    return extension.strip().lstrip("*").lstrip(".").lower()
+
+
+@dataclass(slots=True)
+class EdamTerm:
+    """A single EDAM class, with the fields used for searching and for describing it."""
+    id: str
+    labels: list[str] = field(default_factory=list)
+    synonyms: list[str] = field(default_factory=list)
+    extensions: list[str] = field(default_factory=list)
+    definition: str = ""
+    comment: str = ""
+    parents: list[str] = field(default_factory=list)
+    obsolete: bool = False
+
+    @property
+    def label(self) -> str:
+        return self.labels[0] if self.labels else ""
+
+    def details(self) -> dict:
+        """Return the description of the term as a plain dictionary."""
+        return {
+            "label": self.label,
+            "definition": self.definition,
+            "comment": self.comment,
+            "synonyms": list(self.synonyms),
+            "parents": list(self.parents),
+            "obsolete": self.obsolete,
+        }
+
+
+def load_edam_terms(onto) -> list[EdamTerm]:
+    """
+    Read every EDAM class (formats, data, operations and topics) of an owlready2 ontology, in ontology order.
+
+    Args:
+        onto (Ontology): The loaded EDAM ontology.
+
+    Returns:
+        list: The terms.
+    """
+    terms = []
+    for match in onto.classes():
+        if not _EDAM_ID_RE.match(match.name):
+            continue
+        definitions = _annotation(match, "hasDefinition")
+        comments = _annotation(match, "comment")
+        terms.append(EdamTerm(
+            id=match.name,
+            labels=_annotation(match, "label"),
+            synonyms=_annotation(match, "hasExactSynonym") + _annotation(match, "hasNarrowSynonym"),
+            extensions=_annotation(match, "file_extension"),
+            definition=definitions[0] if definitions else "",
+            comment=comments[0] if comments else "",
+            parents=[parent.name for parent in match.is_a if _EDAM_ID_RE.match(getattr(parent, "name", "") or "")],
+            obsolete=any(str(value).lower() == "true" for value in _annotation(match, "deprecated")),
+        ))
+    return terms
+
+
+class EdamIndex:
+    """
+    In-memory search index over EDAM terms, built once from the loaded ontology.
+
+    It holds a token -> term ids inverted index and a sorted array of every suffix of every
+    searchable text (term id, labels and synonyms). A substring query is then a binary search in the
+    suffix array, so its cost depends on the number of matches and not on the number of terms.
+
+    It also holds two exact lookup tables: file extension -> term ids (from the EDAM `file_extension`
+    annotations) and lowercase label, synonym or acronym -> term ids.
+
+    For ranking, every term is a BM25 document made of its labels, synonyms and definition, the tokens of
+    each field counted `FIELD_WEIGHTS` times.
+    """
+
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    FIELD_WEIGHTS = {"labels": 3, "synonyms": 2, "definition": 1}
+    # Added to the BM25 score of exact file extension or name hits, and of the terms matching every query word
+    DIRECT_BOOST = 10.0
+    MATCH_BOOST = 1.0
+    # Obsolete terms are kept searchable but ranked after their replacements
+    OBSOLETE_FACTOR = 0.5
+
+    def __init__(self, terms: list[EdamTerm]):
+        self.terms = {term.id: term for term in terms}
+        # Position of each term in the ontology, used to return results in a stable order
+        self._rank = {term.id: i for i, term in enumerate(terms)}
+        self.tokens = defaultdict(set)
+        self.extensions = defaultdict(list)
+        self.names = defaultdict(list)
+
+        suffixes = []
+        for term in terms:
+            for extension in term.extensions:
+                self._add_unique(self.extensions, normalize_extension(extension), term.id)
+            for name in [*term.labels, *term.synonyms]:
+                self._add_unique(self.names, name.strip().lower(), term.id)
+            for text in self._searchable_texts(term):
+                lowered = text.lower()
+                for token in tokenize(lowered):
+                    self.tokens[token].add(term.id)
+                for start in range(len(lowered)):
+                    suffixes.append((lowered[start:], term.id))
+        suffixes.sort()
+        self._suffixes = [suffix for suffix, _ in suffixes]
+        self._suffix_ids = [term_id for _, term_id in suffixes]
+
+        # token -> {term id: weighted frequency}, document lengths and inverse document frequencies for BM25
+        self._postings = defaultdict(dict)
+        self._lengths = {}
+        for term in terms:
+            frequencies = Counter()
+            for field_name, weight in self.FIELD_WEIGHTS.items():
+                values = getattr(term, field_name)
+                for text in ([values] if isinstance(values, str) else values):
+                    for token in tokenize(text):
+                        frequencies[token] += weight
+            self._lengths[term.id] = sum(frequencies.values())
+            for token, frequency in frequencies.items():
+                self._postings[token][term.id] = frequency
+        self._average_length = sum(self._lengths.values()) / len(self._lengths) if self._lengths else 1.0
+        self._idf = {
+            token: math.log(1 + (len(terms) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for token, postings in self._postings.items()
+        }
+
+    @classmethod
+    def from_ontology(cls, onto, prefix: str = "format_") -> "EdamIndex":
+        """
+        Build the index from an owlready2 EDAM ontology.
+
+        Args:
+            onto (Ontology): The loaded EDAM ontology.
+            prefix (str): Only classes whose name starts with this prefix are indexed.
+
+        Returns:
+            EdamIndex: The search index.
+        """
+        return cls([term for term in load_edam_terms(onto) if term.id.startswith(prefix)])
+
+    @staticmethod
+    def _add_unique(table: dict, key: str, term_id: str):
+        if key and term_id not in table[key]:
+            table[key].append(term_id)
+
+    @staticmethod
+    def _searchable_texts(term: EdamTerm) -> list[str]:
+        return [term.id, *term.labels, *term.synonyms]
+
+    def lookup_extension(self, extension: str) -> list[str]:
+        """
+        Return the ids of the formats declaring the given file extension.
+
+        Args:
+            extension (str): A file extension such as "fq", ".bam" or "*.html".
+
+        Returns:
+            list: The matching term ids, empty if the extension is unknown.
+        """
+        return list(self.extensions.get(normalize_extension(extension), []))
+
+    def lookup_name(self, name: str) -> list[str]:
+        """
+        Return the ids of the terms whose label, synonym or acronym is exactly the given name.
+
+        Args:
+            name (str): The name to look up, case insensitive.
+
+        Returns:
+            list: The matching term ids, empty if the name is unknown.
+        """
+        return list(self.names.get(name.strip().lower(), []))
+
+    def resolve_pattern(self, pattern: str) -> list[str]:
+        """
+        Resolve an nf-core `pattern:` glob (e.g. "*_{fastqc.html}" or "*.{bam,cram}") to format ids using file extensions.
+
+        The longest known extension wins ("fastq.gz" before "gz"). For compressed files with no compound
+        extension in EDAM, the format of the wrapped file is returned ("reads.fastq.gz" -> FASTQ).
+
+        Args:
+            pattern (str): The glob pattern.
+
+        Returns:
+            list: The matching term ids, empty if no extension of the pattern is known.
+        """
+        resolved = []
+        for expanded in expand_braces(pattern):
+            filename = expanded.strip().strip("\"'").rsplit("/", 1)[-1]
+            parts = filename.lower().split(".")[1:]
+            candidates = [".".join(parts[i:]) for i in range(len(parts))]
+            if len(parts) > 1 and parts[-1] in COMPRESSION_EXTENSIONS:
+                # Compound extensions first ("fastq.gz"), then the wrapped format ("fastq"), then the compression ("gz")
+                inner = parts[:-1]
+                candidates = candidates[:-1] + [".".join(inner[i:]) for i in range(len(inner))] + candidates[-1:]
+            for candidate in candidates:
+                term_ids = self.lookup_extension(candidate)
+                if term_ids:
+                    for term_id in term_ids:
+                        if term_id not in resolved:
+                            resolved.append(term_id)
+                    break
+        return resolved
+
+    def substring_matches(self, fragment: str) -> set[str]:
+        """
+        Return the ids of the terms containing the fragment in their id, one of their labels or synonyms.
+
+        Args:
+            fragment (str): The text to look for, case insensitive.
+
+        Returns:
+            set: The matching term ids.
+        """
+        fragment = fragment.lower()
+        start = bisect_left(self._suffixes, fragment)
+        # Every suffix starting with the fragment sorts before fragment + the highest code point
+        end = bisect_left(self._suffixes, fragment + "\uffff", lo=start)
+        return set(self._suffix_ids[start:end])
+
+    def search(self, query: str = None) -> list[str]:
+        """
+        Search the indexed terms.
+
+        Glob patterns ("*.html") and file names ("fastq.gz") are resolved through the file extension table. For other queries,
+        exact file extension, label, synonym or acronym hits are returned first, followed by the terms
+        where every word of the query appears in the id, a label or a synonym (whole-token matches first).
+
+        Args:
+            query (str): One or more words, a file extension or a glob pattern. If empty, all terms are returned.
+
+        Returns:
+            list: The matching term ids.
+        """
+        words = query.lower().split() if query else []
+        if not words:
+            return list(self.terms)
+        if "*" in query:
+            return self.resolve_pattern(query.strip())
+        if "." in query and len(words) == 1:
+            return self.resolve_pattern("*." + normalize_extension(query))
+
+        direct = []
+        for term_id in self.lookup_extension(query) + self.lookup_name(query):
+            if term_id not in direct:
+                direct.append(term_id)
+
+        matches = None
+        for word in words:
+            word_matches = self.substring_matches(word)
+            matches = word_matches if matches is None else matches & word_matches
+            if not matches:
+                return direct
+
+        exact = set(matches)
+        for token in tokenize(" ".join(words)):
+            exact &= self.tokens.get(token, set())
+
+        ranked = sorted(matches - set(direct), key=lambda term_id: (term_id not in exact, self._rank[term_id]))
+        return direct + ranked
+
+    def bm25_scores(self, tokens: list[str]) -> dict[str, float]:
+        """
+        Score the terms containing at least one of the tokens with BM25.
+
+        Args:
+            tokens (list): The query tokens, see `tokenize`.
+
+        Returns:
+            dict: The BM25 score of each matching term id.
+        """
+        scores = defaultdict(float)
+        for token in set(tokens):
+            idf = self._idf.get(token)
+            if idf is None:
+                continue
+            for term_id, frequency in self._postings[token].items():
+                norm = self.BM25_K1 * (1 - self.BM25_B + self.BM25_B * self._lengths[term_id] / self._average_length)
+                scores[term_id] += idf * frequency * (self.BM25_K1 + 1) / (frequency + norm)
+        return scores
+
+    def rank(self, query: str = None, top_k: int = 10) -> list[tuple[str, float]]:
+        """
+        Search the indexed terms and return the most relevant ones with their score.
+
+        The terms found by `search` (exact extension or name hits, then terms matching every query word)
+        get a boost on top of their BM25 score over labels, synonyms and definitions, so that they come first;
+        terms only matching some words, or only in their definition, follow. Obsolete terms are ranked down.
+
+        Args:
+            query (str): One or more words, a file extension or a glob pattern. If empty, the first terms are returned.
+            top_k (int): The maximum number of results.
+
+        Returns:
+            list: (term id, score) tuples, best first.
+        """
+        if not query or not query.split():
+            return [(term_id, 0.0) for term_id in list(self.terms)[:top_k]]
+
+        matches = self.search(query)
+        words = query.split()
+        if "*" in query or ("." in query and len(words) == 1):
+            # Resolved from file extensions only
+            direct = set(matches)
+        else:
+            direct = set(self.lookup_extension(query) + self.lookup_name(query))
+
+        scores = self.bm25_scores(tokenize(query))
+        for term_id in matches:
+            scores[term_id] += self.DIRECT_BOOST if term_id in direct else self.MATCH_BOOST
+        for term_id in scores:
+            if self.terms[term_id].obsolete:
+                scores[term_id] *= self.OBSOLETE_FACTOR
+
+        ranked = sorted(scores, key=lambda term_id: (-scores[term_id], self._rank[term_id]))
+        return [(term_id, round(scores[term_id], 3)) for term_id in ranked[:top_k]]
+
+
+def _annotation(entity, name: str) -> list[str]:
+    """Return the values of an owlready2 annotation as strings, or an empty list if the annotation is not defined."""
+    try:
+        return [str(value) for value in getattr(entity, name, None) or []]
+    except (AttributeError, TypeError):
+        return []
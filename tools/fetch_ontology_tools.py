@@ -1,76 +1,274 @@
+import os
+import pickle
+import threading
 from smolagents import tool
-from owlready2 import get_ontology
+from owlready2 import World
+from tools.cache_tools import get_cache_dir
+from tools.edam_index import EdamIndex, EdamTerm, load_edam_terms
+from tools.semantic_index import SemanticIndex, embedding_model_slug, np
+
+# EDAM release used by the agent. The compiled snapshot on disk is keyed by this value,
+# so bumping it triggers a fresh download on the next start.
+EDAM_RELEASE = "1.25"
+EDAM_URL = f"https://raw.githubusercontent.com/edamontology/edamontology/main/releases/EDAM_{EDAM_RELEASE}.owl"
+EDAM_BASE_IRI = "http://edamontology.org/"
+
+# Bumped when the fields of EdamTerm change, so that older term tables are rebuilt
+_TERM_TABLE_VERSION = 1
+
+# Optional semantic search, with an embedding model served by Ollama (or any LiteLLM embedding model)
+SEMANTIC_SEARCH = os.environ.get("AGENTONTOLOGY_SEMANTIC_SEARCH", "0") == "1"
+EMBEDDING_MODEL = os.environ.get("AGENTONTOLOGY_EMBEDDING_MODEL", "ollama/nomic-embed-text")
+EMBEDDING_API_BASE = os.environ.get("AGENTONTOLOGY_EMBEDDING_API_BASE", "http://localhost:11434")
+
+_edam_ontology = None
+_edam_terms = None
+_edam_index = None
+_semantic_index = None
+# Reentrant, the term table loads the ontology while holding it
+_edam_lock = threading.RLock()
+
+
+def get_edam_snapshot_path() -> str:
+    """
+    Return the path of the compiled EDAM snapshot (an owlready2 SQLite quadstore) for the current release.
+
+    Returns:
+        str: The path to the snapshot file.
+    """
+    return str(get_cache_dir("edam") / f"EDAM_{EDAM_RELEASE}.sqlite3")
 
 
 def load_edam_ontology():
     """
-    Loads the EDAM ontology OWL file from GitHub using owlready2.
-    
+    Loads the EDAM ontology using owlready2.
+
+    The ontology is read from the local compiled snapshot if it exists. Otherwise the OWL file
+    is downloaded from GitHub, parsed, and saved as a snapshot so that later cold starts
+    do not need network access.
+
     Returns:
         Ontology: The loaded EDAM ontology object, or None if loading fails
     """
-    # URL to the raw EDAM ontology OWL file
-    url = "https://raw.githubusercontent.com/edamontology/edamontology/main/releases/EDAM_1.25.owl"
-    
+    snapshot_path = get_edam_snapshot_path()
+    # Compile into a temporary file first so that an interrupted download never leaves a broken snapshot
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+
     try:
-        # Load the ontology directly from the URL
-        onto = get_ontology(url).load()
-        print(f"Successfully loaded EDAM ontology: {onto}")
+        if os.path.exists(snapshot_path):
+            world = World(filename=snapshot_path, exclusive=False)
+            # The quadstore stores the ontology under its own IRI, not under the download URL
+            if EDAM_BASE_IRI in world.ontologies:
+                onto = world.get_ontology(EDAM_BASE_IRI)
+                print(f"Successfully loaded EDAM ontology from snapshot: {snapshot_path}")
+                return onto
+            # Incomplete snapshot, compile it again
+            world.close()
+            os.remove(snapshot_path)
+
+        world = World(filename=tmp_path, exclusive=False)
+        world.get_ontology(EDAM_URL).load()
+        world.save()
+        world.close()
+        os.replace(tmp_path, snapshot_path)
+
+        world = World(filename=snapshot_path, exclusive=False)
+        onto = world.get_ontology(EDAM_BASE_IRI)
+        print(f"Successfully loaded EDAM ontology: {onto} (snapshot saved to {snapshot_path})")
         return onto
     except Exception as e:
         print(f"Error loading EDAM ontology: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return None
 
+
+def get_edam_ontology():
+    """
+    Thread-safe accessor returning the process-wide EDAM ontology.
+
+    The ontology is loaded on the first call only, every later call returns the same object.
+    A failed load is not cached, so the next call will try again.
+
+    Returns:
+        Ontology: The loaded EDAM ontology object, or None if loading fails
+    """
+    global _edam_ontology
+    if _edam_ontology is None:
+        with _edam_lock:
+            if _edam_ontology is None:
+                _edam_ontology = load_edam_ontology()
+    return _edam_ontology
+
+
+def get_edam_term_table_path() -> str:
+    """
+    Return the path of the precomputed EDAM term table for the current release.
+
+    Returns:
+        str: The path to the pickled term table.
+    """
+    return str(get_cache_dir("edam") / f"EDAM_{EDAM_RELEASE}.terms.v{_TERM_TABLE_VERSION}.pickle")
+
+
+def load_edam_terms_table() -> dict[str, EdamTerm]:
+    """
+    Load the table of every EDAM term (label, definition, comment, synonyms, parents, obsolete flag).
+
+    The table is read from its pickle in the cache directory. Otherwise it is built from the ontology
+    and saved, so that later starts need neither the ontology nor owlready2 queries.
+
+    Returns:
+        dict: The terms keyed by id (e.g. "format_1930"), in ontology order, or None if the ontology could not be loaded
+    """
+    table_path = get_edam_term_table_path()
+    if os.path.exists(table_path):
+        try:
+            with open(table_path, "rb") as fh:
+                return pickle.load(fh)
+        except Exception as e:
+            print(f"Error reading the EDAM term table {table_path}, building it again: {e}")
+
+    onto = get_edam_ontology()
+    if onto is None:
+        return None
+    terms = {term.id: term for term in load_edam_terms(onto)}
+
+    tmp_path = f"{table_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as fh:
+            pickle.dump(terms, fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, table_path)
+    except OSError as e:
+        print(f"Could not save the EDAM term table to {table_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return terms
+
+
+def get_edam_terms() -> dict[str, EdamTerm]:
+    """
+    Thread-safe accessor returning the process-wide EDAM term table.
+
+    Returns:
+        dict: The terms keyed by id, or None if the ontology could not be loaded
+    """
+    global _edam_terms
+    if _edam_terms is None:
+        with _edam_lock:
+            if _edam_terms is None:
+                _edam_terms = load_edam_terms_table()
+    return _edam_terms
+
+
+def get_edam_index() -> EdamIndex:
+    """
+    Thread-safe accessor returning the process-wide search index over EDAM formats.
+
+    The index is built from the term table on the first call only.
+
+    Returns:
+        EdamIndex: The search index, or None if the ontology could not be loaded
+    """
+    global _edam_index
+    if _edam_index is None:
+        terms = get_edam_terms()
+        if terms is None:
+            return None
+        with _edam_lock:
+            if _edam_index is None:
+                _edam_index = EdamIndex([term for term in terms.values() if term.id.startswith("format_")])
+    return _edam_index
+
+def semantic_search_available() -> bool:
+    """
+    Return whether the semantic search is enabled (AGENTONTOLOGY_SEMANTIC_SEARCH=1) and NumPy is installed.
+
+    Returns:
+        bool: True if the semantic search tool can be used.
+    """
+    return SEMANTIC_SEARCH and np is not None
+
+
+def get_semantic_index_path() -> str:
+    """
+    Return the path of the EDAM embeddings matrix for the current release and embedding model.
+
+    Returns:
+        str: The path to the .npy file.
+    """
+    return str(get_cache_dir("edam") / f"EDAM_{EDAM_RELEASE}.embeddings.{embedding_model_slug(EMBEDDING_MODEL)}.npy")
+
+
+def embed_texts(texts: list[str]) -> list[list[float]]:
+    """
+    Embed texts with the configured embedding model.
+
+    Args:
+        texts (list): The texts to embed.
+
+    Returns:
+        list: One embedding per text.
+    """
+    import litellm
+
+    response = litellm.embedding(model=EMBEDDING_MODEL, input=texts, api_base=EMBEDDING_API_BASE)
+    return [item["embedding"] if isinstance(item, dict) else item.embedding for item in response.data]
+
+
+def get_semantic_index() -> SemanticIndex:
+    """
+    Thread-safe accessor returning the process-wide semantic index over EDAM formats and data.
+
+    The terms are embedded on the first use of a release and embedding model, and the matrix is saved
+    to the cache directory. Later starts memory-map it without embedding anything.
+
+    Returns:
+        SemanticIndex: The semantic index, or None if it is not available or the ontology could not be loaded
+    """
+    global _semantic_index
+    if _semantic_index is None and semantic_search_available():
+        with _edam_lock:
+            if _semantic_index is None:
+                index_path = get_semantic_index_path()
+                if os.path.exists(index_path):
+                    _semantic_index = SemanticIndex.load(index_path)
+                else:
+                    terms = get_edam_terms()
+                    if terms is None:
+                        return None
+                    selected = [
+                        term for term in terms.values()
+                        if term.id.startswith(("format_", "data_")) and not term.obsolete
+                    ]
+                    print(f"Embedding {len(selected)} EDAM terms with {EMBEDDING_MODEL}...")
+                    _semantic_index = SemanticIndex.build(selected, embed_texts)
+                    _semantic_index.save(index_path)
+    return _semantic_index
+
 @tool
-def search_edam_ontology_by_search_term(search_term: str = None) -> list[str]:
+def search_edam_ontology_by_search_term(search_term: str = None, top_k: int = 10) -> list[dict]:
     """
-    Generic function to search by EDAM entity type using native search. The native search is strict so you need to provide single word search terms (for example: 'fasta').
+    Generic function to search EDAM formats by name, label, synonym, definition or file extension. The search term can be a single word (for example: 'fasta'), several words (for example: 'bam index'), a file extension (for example: 'fq' or 'fastq.gz') or a glob pattern (for example: '*.html' or '*_{fastqc.html}'). Results are ranked by relevance, best first.
     
     Args:
-        search_term: single word search term to filter results
+        search_term: words, file extension or glob pattern to filter results
+        top_k: maximum number of results to return
     
     Returns:
-        list: List of matching classes
+        list: The best matching formats, as dictionaries with the term "id" (e.g. "format_1930"), its "label" and its relevance "score"
     """
-    onto = load_edam_ontology()
-    entity_type = "format"
-    # Search using IRI pattern matching
-    pattern = f"*{entity_type}_*"
-    matches = onto.search(iri=pattern)
-    
-    # Filter by search term if provided
-    if search_term:
-        search_term_lower = search_term.lower()
-        filtered_matches = []
-        
-        for match in matches:
-            # Check name
-            if search_term_lower in match.name.lower():
-                filtered_matches.append(match)
-                continue
-                
-            # Check labels
-            if hasattr(match, 'label') and match.label:
-                for label in match.label:
-                    if search_term_lower in str(label).lower():
-                        filtered_matches.append(match)
-                        break
-        
-        matches = filtered_matches
-    
-    # Print results  
+    index = get_edam_index()
+    if index is None:
+        return []
+    results = [
+        {"id": term_id, "label": index.terms[term_id].label, "score": score}
+        for term_id, score in index.rank(search_term, top_k=max(1, top_k))
+    ]
+
     search_desc = f" matching '{search_term}'" if search_term else ""
-    print(f"\nFound {len(matches)} {entity_type}(s){search_desc}:")
-    for i, match in enumerate(matches[:10]):  # Limit to 10 for readability
-        print(f"{i+1}. {match.name}")
-        if hasattr(match, 'label') and match.label:
-            print(f"   Label: {match.label[0]}")
-        print()
-    
-    if len(matches) > 10:
-        print(f"... and {len(matches) - 10} more results")
-    
-    return [match.name for match in matches]
+    print(f"Found {len(results)} format(s){search_desc}: {', '.join(result['id'] for result in results)}")
+    return results
 
 @tool
 def get_edam_description_from_ontology_format_class(term_id: str) -> str:
@@ -83,28 +281,61 @@ def get_edam_description_from_ontology_format_class(term_id: str) -> str:
     Returns:
         str: The description/label of the term, or None if not found
     """
-    onto = load_edam_ontology()
-    if not onto:
+    terms = get_edam_terms()
+    if not terms:
         return None
-    
-    try:
-        # Get the class directly by name
-        term_class = getattr(onto, term_id)
-        
-        # Try to get hasDefinition first (detailed description)
-        if hasattr(term_class, 'hasDefinition') and term_class.hasDefinition:
-            return str(term_class.hasDefinition[0])
-        
-        # Fall back to comment if no definition
-        elif hasattr(term_class, 'comment') and term_class.comment:
-            return str(term_class.comment[0])
-        
-        # Fall back to label if no comment or definition
-        elif hasattr(term_class, 'label') and term_class.label:
-            return str(term_class.label[0])
-        
-        else:
-            return f"No description found for {term_id}"
-            
-    except AttributeError:
+
+    term = terms.get(term_id.strip())
+    if term is None:
         return f"Term {term_id} not found in EDAM ontology"
+
+    # Definition first (detailed description), then comment, then label
+    description = term.definition or term.comment or term.label
+    if not description:
+        return f"No description found for {term_id}"
+    return description
+
+@tool
+def get_edam_term_details(term_ids: list[str]) -> dict:
+    """
+    Get the details of several EDAM terms in one call: label, definition, comment, synonyms, parent terms and whether the term is obsolete. Use this tool to check all your candidate formats at once (for example: ['format_1930', 'format_1931']) instead of one by one. Do not use obsolete terms.
+
+    Args:
+        term_ids: EDAM term IDs like "format_1930" or "data_1234"
+
+    Returns:
+        dict: The details of each term, keyed by term ID. Unknown IDs map to None.
+    """
+    terms = get_edam_terms()
+    if not terms:
+        return {}
+
+    details = {}
+    for term_id in term_ids:
+        term = terms.get(term_id.strip())
+        details[term_id] = term.details() if term else None
+    return details
+
+@tool
+def semantic_search_edam(description: str, top_k: int = 10) -> list[dict]:
+    """
+    Search EDAM formats and data by meaning rather than by name, for descriptions that do not name the format (for example: 'read alignments' or 'table of variant calls'). Use it when search_edam_ontology_by_search_term finds nothing relevant.
+
+    Args:
+        description: free-text description of the file content
+        top_k: maximum number of results to return
+
+    Returns:
+        list: The closest terms, as dictionaries with the term "id" (e.g. "format_2572"), its "label" and its cosine similarity "score"
+    """
+    index = get_semantic_index()
+    if index is None:
+        return []
+    terms = get_edam_terms()
+    results = [
+        {"id": term_id, "label": terms[term_id].label, "score": score}
+        for term_id, score in index.search(embed_texts([description])[0], top_k=max(1, top_k))
+    ]
+
+    print(f"Found {len(results)} term(s) close to '{description}': {', '.join(result['id'] for result in results)}")
+    return results
@@ -0,0 +1,131 @@
+from tools.edam_index import EdamIndex, expand_braces, tokenize
+from tools.fetch_ontology_tools import get_edam_index, get_edam_terms
+
+# Words turning a format name in a description into something else, e.g. "FASTA index"
+_UNSAFE_DESCRIPTION_WORDS = {"index", "indexes", "indices", "idx"}
+
+# Words of any description, naming no format in particular
+_GENERIC_DESCRIPTION_WORDS = {"format", "formats", "file", "files", "data", "text", "binary"}
+
+# The root of the EDAM formats and its top-level classes, e.g. "Textual format": a file is never annotated with them
+_GENERIC_FORMATS = {"format_1915", "format_2330", "format_2333", "format_2350"}
+
+
+def _is_obsolete(term_id: str, index: EdamIndex) -> bool:
+    term = index.terms.get(term_id)
+    return term is None or term.obsolete
+
+
+def _resolve_glob(pattern: str, index: EdamIndex) -> list[str]:
+    """
+    Resolve a glob to format ids, only if every brace alternative maps to exactly one format.
+
+    Returns:
+        list: The format ids, or an empty list if any alternative is unknown or ambiguous.
+    """
+    resolved = []
+    for alternative in expand_braces(pattern):
+        term_ids = [term_id for term_id in index.resolve_pattern(alternative) if not _is_obsolete(term_id, index)]
+        if len(term_ids) != 1:
+            return []
+        if term_ids[0] not in resolved:
+            resolved.append(term_ids[0])
+    return resolved
+
+
+def _resolve_description(description: str, index: EdamIndex) -> list[str]:
+    """
+    Resolve a free-text description to a format id, only if exactly one format is named in it.
+
+    Generic words ("format", "file", ...) and the top-level formats they name are ignored, as are obsolete formats.
+
+    Returns:
+        list: The format id, or an empty list if no format or several formats are named.
+    """
+    words = tokenize(description)
+    if _UNSAFE_DESCRIPTION_WORDS.intersection(words):
+        return []
+    named = set()
+    for word in words:
+        if word in _GENERIC_DESCRIPTION_WORDS:
+            continue
+        named.update(
+            term_id for term_id in index.lookup_name(word)
+            if term_id not in _GENERIC_FORMATS and not _is_obsolete(term_id, index)
+        )
+    return sorted(named) if len(named) == 1 else []
+
+
+def pre_resolve_file_format(element_name: str, element: dict, index: EdamIndex = None) -> list[str]:
+    """
+    Try to find the EDAM formats of a meta.yml file element without calling the agent.
+
+    The `pattern` of the element is used first, then the element name if it is a glob (e.g. "*.html"),
+    then the description if the file has neither. A file is only resolved when the match is unambiguous,
+    otherwise an empty list is returned and the file should be sent to the agent.
+
+    Args:
+        element_name (str): The name of the element in the meta.yml file, e.g. "reads" or "*.html".
+        element (dict): The element metadata, with the 'type', 'description' and optional 'pattern' keys.
+        index (EdamIndex): The EDAM format index. Defaults to the process-wide index.
+
+    Returns:
+        list: The EDAM format ids (formatted as format_XXXX), or an empty list if the file could not be resolved.
+    """
+    index = index or get_edam_index()
+    if index is None:
+        return []
+
+    pattern = element.get("pattern")
+    if pattern:
+        return _resolve_glob(str(pattern), index)
+    if "*" in element_name or "." in element_name:
+        return _resolve_glob(element_name, index)
+    return _resolve_description(str(element.get("description", "")), index)
+
+
+def find_candidate_formats(element_name: str, element: dict, top_k: int = 10, index: EdamIndex = None) -> list[str]:
+    """
+    Retrieve the EDAM formats a meta.yml file element most likely has, for a model to choose from.
+
+    The formats ranked for the `pattern`, the element name and the description are taken in turn, so that the
+    file extension and the description both contribute their best matches. Obsolete formats are left out.
+
+    Args:
+        element_name (str): The name of the element in the meta.yml file, e.g. "reads" or "*.html".
+        element (dict): The element metadata, with the 'type', 'description' and optional 'pattern' keys.
+        top_k (int): The maximum number of candidates.
+        index (EdamIndex): The EDAM format index. Defaults to the process-wide index.
+
+    Returns:
+        list: The candidate format ids, most relevant first, or an empty list if the index could not be loaded.
+    """
+    index = index or get_edam_index()
+    if index is None:
+        return []
+
+    queries = [str(element.get("pattern") or ""), element_name, str(element.get("description", ""))]
+    rankings = [[term_id for term_id, _ in index.rank(query, top_k=top_k)] for query in queries if query.strip()]
+    candidates = []
+    for rank in range(top_k):
+        for ranking in rankings:
+            if rank < len(ranking) and ranking[rank] not in candidates and not index.terms[ranking[rank]].obsolete:
+                candidates.append(ranking[rank])
+    return candidates[:top_k]
+
+
+def invalid_format_ids(term_ids: list[str]) -> list[str]:
+    """
+    Check the format ids of a model answer against the EDAM term table.
+
+    Args:
+        term_ids (list): The format ids, e.g. ["format_1930"].
+
+    Returns:
+        list: The ids that are unknown, obsolete or not formats (e.g. "data_2044"), in order.
+    """
+    terms = get_edam_terms() or {}
+    return [
+        term_id for term_id in term_ids
+        if not isinstance(term_id, str) or not term_id.startswith("format_") or term_id not in terms or terms[term_id].obsolete
+    ]
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import threading
+import time
+import weakref
+from collections import OrderedDict
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class CachedHttpClient:
+    """
+    Shared HTTP client for the remote APIs used by the tools (bio.tools, GitHub).
+
+    It keeps a pool of keep-alive connections, applies explicit timeouts, retries with exponential
+    backoff on 429 and 5xx responses, and caches responses for `ttl` seconds. Expired entries with an
+    ETag are revalidated with a conditional request instead of being downloaded again.
+    The instance can be shared between threads.
+
+    The *_async methods do the same with aiohttp, one connection pool per event loop, and share the cache
+    with the blocking methods.
+    """
+
+    def __init__(self, timeout: tuple = (5, 30), retries: int = 3, backoff_factor: float = 0.5, ttl: float = 3600, max_entries: int = 1024, pool_maxsize: int = 16):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_maxsize = pool_maxsize
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # url -> {"expires_at", "etag", "text", "json"}, in least recently used order
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # aiohttp sessions are bound to the event loop they were created in
+        self._async_sessions = weakref.WeakKeyDictionary()
+
+    def _cached(self, url: str) -> tuple:
+        """Return (entry, fresh) for a URL, entry being None if it is not cached."""
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is None:
+                return None, False
+            self._cache.move_to_end(url)
+            return entry, entry["expires_at"] > time.time()
+
+    def _store(self, url: str, text: str, etag: str, ttl: float) -> dict:
+        entry = {"expires_at": time.time() + ttl, "etag": etag, "text": text, "json": None}
+        with self._lock:
+            self._cache[url] = entry
+            self._cache.move_to_end(url)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return entry
+
+    def _fetch(self, url: str, ttl: float = None) -> dict:
+        ttl = self.ttl if ttl is None else ttl
+        entry, fresh = self._cached(url)
+        if fresh:
+            return entry
+
+        headers = {"If-None-Match": entry["etag"]} if entry is not None and entry["etag"] else {}
+        response = self.session.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304 and entry is not None:
+            entry["expires_at"] = time.time() + ttl
+            return entry
+        response.raise_for_status()  # Raise an error for bad status codes
+
+        return self._store(url, response.text, response.headers.get("ETag"), ttl)
+
+    def _async_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        session = self._async_sessions.get(loop)
+        if session is None or session.closed:
+            connect_timeout, read_timeout = self.timeout
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_maxsize),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout),
+            )
+            self._async_sessions[loop] = session
+        return session
+
+    async def _fetch_async(self, url: str, ttl: float = None) -> dict:
+        ttl = self.ttl if ttl is None else ttl
+        entry, fresh = self._cached(url)
+        if fresh:
+            return entry
+
+        headers = {"If-None-Match": entry["etag"]} if entry is not None and entry["etag"] else {}
+        session = self._async_session()
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status == 304 and entry is not None:
+                        entry["expires_at"] = time.time() + ttl
+                        return entry
+                    retryable = response.status in (429, 500, 502, 503, 504)
+                    if not retryable or attempt == self.retries:
+                        response.raise_for_status()  # Raise an error for bad status codes
+                        return self._store(url, await response.text(), response.headers.get("ETag"), ttl)
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    if isinstance(e, aiohttp.ClientError):
+                        raise
+                    # A bare TimeoutError has no message, and callers only expect aiohttp errors
+                    raise aiohttp.ServerTimeoutError(f"Timeout after {self.retries + 1} attempts: {url}") from e
+                retry_after = None
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else self.backoff_factor * 2 ** attempt
+            await asyncio.sleep(delay)
+
+    def get_text(self, url: str, ttl: float = None) -> str:
+        """
+        GET a URL and return the response body, from the cache if it is still fresh.
+
+        Args:
+            url (str): The URL to get.
+            ttl (float): How long the response is cached, in seconds. Defaults to the client ttl.
+
+        Returns:
+            str: The response body.
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails after all the retries.
+        """
+        return self._fetch(url, ttl)["text"]
+
+    def get_json(self, url: str, ttl: float = None):
+        """
+        GET a URL and return the parsed JSON response. The parsed payload is cached with the response,
+        so the returned object is shared between callers and must not be modified.
+
+        Args:
+            url (str): The URL to get.
+            ttl (float): How long the response is cached, in seconds. Defaults to the client ttl.
+
+        Returns:
+            The parsed JSON payload.
+
+        Raises:
+            requests.exceptions.RequestException: If the request fails after all the retries.
+        """
+        entry = self._fetch(url, ttl)
+        if entry["json"] is None:
+            entry["json"] = json.loads(entry["text"])
+        return entry["json"]
+
+    async def get_text_async(self, url: str, ttl: float = None) -> str:
+        """
+        Asynchronous version of `get_text`.
+
+        Raises:
+            aiohttp.ClientError: If the request fails after all the retries.
+        """
+        return (await self._fetch_async(url, ttl))["text"]
+
+    async def get_json_async(self, url: str, ttl: float = None):
+        """
+        Asynchronous version of `get_json`.
+
+        Raises:
+            aiohttp.ClientError: If the request fails after all the retries.
+        """
+        entry = await self._fetch_async(url, ttl)
+        if entry["json"] is None:
+            entry["json"] = json.loads(entry["text"])
+        return entry["json"]
+
+    async def aclose(self):
+        """Close the aiohttp session of the running event loop."""
+        session = self._async_sessions.pop(asyncio.get_running_loop(), None)
+        if session is not None:
+            await session.close()
+
+
+_http_client = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> CachedHttpClient:
+    """
+    Return the process-wide HTTP client.
+
+    Returns:
+        CachedHttpClient: The shared HTTP client.
+    """
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                _http_client = CachedHttpClient()
+    return _http_client
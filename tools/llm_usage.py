@@ -0,0 +1,102 @@
+import threading
+from dataclasses import dataclass
+import litellm
+from litellm.integrations.custom_logger import CustomLogger
+
+
+@dataclass(slots=True)
+class LLMCall:
+    """
+    Token counts and latency of one LLM call.
+
+    Attributes:
+        model (str): The model id.
+        prompt_tokens (int): The prompt tokens evaluated by the server. With Ollama, a prefix reused from the
+            previous request of the same model is not evaluated again and not counted.
+        completion_tokens (int): The tokens generated.
+        seconds (float): The duration of the call.
+    """
+    model: str
+    prompt_tokens: int
+    completion_tokens: int
+    seconds: float
+
+
+class LLMUsage(CustomLogger):
+    """
+    LiteLLM callback recording the prompt-eval and eval tokens of every LLM call, agent steps included.
+
+    Each call is printed, so that it shows in the logs of the request that made it. The instance can be shared between threads.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, call: LLMCall):
+        """
+        Record a call.
+
+        Args:
+            call (LLMCall): The call.
+        """
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += call.prompt_tokens
+            self.completion_tokens += call.completion_tokens
+            self.seconds += call.seconds
+        print(f"LLM call to {call.model}: {call.prompt_tokens} prompt tokens evaluated, {call.completion_tokens} generated, {call.seconds:.1f}s")
+
+    def log_success_event(self, kwargs, response_obj, start_time, end_time):
+        usage = getattr(response_obj, "usage", None)
+        if usage is None:
+            return
+        duration = end_time - start_time
+        self.record(LLMCall(
+            model=kwargs.get("model", ""),
+            prompt_tokens=usage.prompt_tokens or 0,
+            completion_tokens=usage.completion_tokens or 0,
+            seconds=duration.total_seconds() if hasattr(duration, "total_seconds") else float(duration),
+        ))
+
+    async def async_log_success_event(self, kwargs, response_obj, start_time, end_time):
+        self.log_success_event(kwargs, response_obj, start_time, end_time)
+
+    def stats(self) -> dict:
+        """
+        Return the totals of the calls of this process.
+
+        Returns:
+            dict: The number of calls, prompt and completion tokens, and seconds spent in calls.
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "seconds": round(self.seconds, 1),
+            }
+
+
+_llm_usage = None
+_llm_usage_lock = threading.Lock()
+
+
+def get_llm_usage() -> LLMUsage:
+    """
+    Return the process-wide LLM usage recorder, registering it as a LiteLLM callback on the first call.
+
+    Returns:
+        LLMUsage: The shared recorder.
+    """
+    global _llm_usage
+    if _llm_usage is None:
+        with _llm_usage_lock:
+            if _llm_usage is None:
+                _llm_usage = LLMUsage()
+                litellm.callbacks.append(_llm_usage)
+    return _llm_usage
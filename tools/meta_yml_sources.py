@@ -0,0 +1,270 @@
+import abc
+import asyncio
+import copy
+import os
+import tarfile
+import threading
+import aiohttp
+import requests
+import yaml
+from tools.http_client import get_http_client
+
+
+def module_name_to_path(module_name: str) -> str:
+    """
+    Convert a module name to its path in the nf-core/modules repository, relative to modules/nf-core.
+
+    Args:
+        module_name (str): The name of the module in the format <tool>_<subtool> or <tool>/<subtool> or <tool> <subtool>.
+                            The subtool is optional.
+                            For example, "bwa_align" or "fastqc" or "bwa align" or "bwa/align".
+    Returns:
+        str: The module path, for example "bwa/align" or "fastqc".
+    """
+    if "_" in module_name:
+        tool, subtool = module_name.split("_")
+    elif "/" in module_name:
+        tool, subtool = module_name.split("/")
+    elif " " in module_name:
+        tool, subtool = module_name.split(" ")
+    else:
+        tool, subtool = module_name, ""
+
+    return f"{tool}/{subtool}" if subtool != "" else tool
+
+
+class MetaYmlSource(abc.ABC):
+    """Base class of the places nf-core module meta.yml files are read from."""
+
+    @abc.abstractmethod
+    def get(self, module_name: str) -> dict:
+        """
+        Return the parsed meta.yml file of a module.
+
+        Args:
+            module_name (str): The module name (see `module_name_to_path`) or its path relative to modules/nf-core.
+
+        Returns:
+            dict: The meta.yml file of the given module as a dictionary.
+        """
+
+    async def get_async(self, module_name: str) -> dict:
+        """
+        Asynchronous version of `get`. Defaults to running `get` in a worker thread.
+        """
+        return await asyncio.to_thread(self.get, module_name)
+
+    @abc.abstractmethod
+    def get_text(self, module_name: str) -> str:
+        """
+        Return the raw meta.yml file of a module, as needed to update it without reformatting.
+
+        Args:
+            module_name (str): The module name (see `module_name_to_path`) or its path relative to modules/nf-core.
+
+        Returns:
+            str: The content of the meta.yml file.
+        """
+
+    async def get_text_async(self, module_name: str) -> str:
+        """
+        Asynchronous version of `get_text`. Defaults to running `get_text` in a worker thread.
+        """
+        return await asyncio.to_thread(self.get_text, module_name)
+
+    @abc.abstractmethod
+    def list_modules(self) -> list[str]:
+        """
+        List the modules available in the source.
+
+        Returns:
+            list: The module paths relative to modules/nf-core, sorted.
+
+        Raises:
+            ValueError: If the source cannot list its modules.
+        """
+
+
+class GitHubMetaYmlSource(MetaYmlSource):
+    """Reads meta.yml files from the nf-core/modules repository on GitHub, one HTTP request per module."""
+
+    def __init__(self, branch: str = "master"):
+        self.base_url = f"https://raw.githubusercontent.com/nf-core/modules/refs/heads/{branch}/modules/nf-core"
+
+    def get(self, module_name: str) -> dict:
+        return yaml.safe_load(self.get_text(module_name))
+
+    async def get_async(self, module_name: str) -> dict:
+        return yaml.safe_load(await self.get_text_async(module_name))
+
+    def get_text(self, module_name: str) -> str:
+        url = f"{self.base_url}/{module_name_to_path(module_name)}/meta.yml"
+        try:
+            return get_http_client().get_text(url)
+        except requests.exceptions.RequestException as e:
+            raise RuntimeError(f"An error occurred while connecting to the URL: {url}. Error message: {e}")
+
+    async def get_text_async(self, module_name: str) -> str:
+        url = f"{self.base_url}/{module_name_to_path(module_name)}/meta.yml"
+        try:
+            return await get_http_client().get_text_async(url)
+        except aiohttp.ClientError as e:
+            raise RuntimeError(f"An error occurred while connecting to the URL: {url}. Error message: {e}")
+
+    def list_modules(self) -> list[str]:
+        raise ValueError("GitHub modules cannot be listed, give the module names or a local nf-core/modules checkout or tarball")
+
+
+class LocalMetaYmlSource(MetaYmlSource):
+    """
+    Reads meta.yml files from a local git checkout of nf-core/modules.
+
+    All the meta.yml paths are indexed on creation. Files are parsed on first access and
+    parsed again only when their modification time changes.
+    """
+
+    def __init__(self, modules_dir: str):
+        nf_core_dir = os.path.join(modules_dir, "modules", "nf-core")
+        # Accept both the root of the checkout and its modules/nf-core directory
+        self.root = nf_core_dir if os.path.isdir(nf_core_dir) else modules_dir
+        self._lock = threading.Lock()
+        # module path -> [meta.yml path, mtime of the parsed content, parsed content]
+        self._index = {}
+        for dirpath, _, filenames in os.walk(self.root):
+            if "meta.yml" in filenames:
+                module_path = os.path.relpath(dirpath, self.root).replace(os.sep, "/")
+                self._index[module_path] = [os.path.join(dirpath, "meta.yml"), None, None]
+
+    def _module_path(self, module_name: str) -> str:
+        module_path = module_name if module_name in self._index else module_name_to_path(module_name)
+        if module_path not in self._index:
+            meta_path = os.path.join(self.root, module_path, "meta.yml")
+            if not os.path.exists(meta_path):
+                raise RuntimeError(f"Module '{module_name}' not found in the local nf-core/modules checkout: {self.root}")
+            # Module added after the index was built
+            with self._lock:
+                self._index[module_path] = [meta_path, None, None]
+        return module_path
+
+    def path(self, module_name: str) -> str:
+        """
+        Return the path of the meta.yml file of a module.
+
+        Args:
+            module_name (str): The module name or its path relative to modules/nf-core.
+
+        Returns:
+            str: The path to the meta.yml file.
+        """
+        return self._index[self._module_path(module_name)][0]
+
+    def get(self, module_name: str) -> dict:
+        module_path = self._module_path(module_name)
+        with self._lock:
+            entry = self._index[module_path]
+            mtime = os.stat(entry[0]).st_mtime
+            if entry[1] != mtime:
+                with open(entry[0]) as fh:
+                    entry[2] = yaml.safe_load(fh)
+                entry[1] = mtime
+            # Callers update the meta.yml content in place, never hand out the cached object
+            return copy.deepcopy(entry[2])
+
+    def get_text(self, module_name: str) -> str:
+        # Without newline translation, so that CRLF files are patched and written back with CRLF
+        with open(self.path(module_name), newline="") as fh:
+            return fh.read()
+
+    def list_modules(self) -> list[str]:
+        return sorted(self._index)
+
+
+class TarballMetaYmlSource(MetaYmlSource):
+    """
+    Reads meta.yml files from a tarball of nf-core/modules (e.g. a GitHub archive).
+
+    Every meta.yml member is read in a single pass over the archive on creation, and parsed on first access.
+    The files are read again when the modification time of the tarball changes.
+    """
+
+    def __init__(self, tarball_path: str):
+        self.tarball_path = tarball_path
+        self._lock = threading.Lock()
+        self._build_index()
+
+    def _build_index(self):
+        mtime = os.stat(self.tarball_path).st_mtime
+        # module path -> [meta.yml content, parsed content]
+        index = {}
+        with tarfile.open(self.tarball_path) as tar:
+            for member in tar:
+                parts = member.name.split("/")
+                if not member.isfile() or parts[-1] != "meta.yml" or "nf-core" not in parts[:-1]:
+                    continue
+                start = parts.index("nf-core") + 1
+                if parts[start - 2:start] == ["modules", "nf-core"]:
+                    index["/".join(parts[start:-1])] = [tar.extractfile(member).read().decode(), None]
+        self._index, self._mtime = index, mtime
+
+    def _module_path(self, module_name: str) -> str:
+        if os.stat(self.tarball_path).st_mtime != self._mtime:
+            with self._lock:
+                if os.stat(self.tarball_path).st_mtime != self._mtime:
+                    self._build_index()
+        module_path = module_name if module_name in self._index else module_name_to_path(module_name)
+        if module_path not in self._index:
+            raise RuntimeError(f"Module '{module_name}' not found in the nf-core/modules tarball: {self.tarball_path}")
+        return module_path
+
+    def get(self, module_name: str) -> dict:
+        entry = self._index[self._module_path(module_name)]
+        if entry[1] is None:
+            # Parsing twice on a race is harmless, the result is the same
+            entry[1] = yaml.safe_load(entry[0])
+        # Callers update the meta.yml content in place, never hand out the cached object
+        return copy.deepcopy(entry[1])
+
+    def get_text(self, module_name: str) -> str:
+        return self._index[self._module_path(module_name)][0]
+
+    def list_modules(self) -> list[str]:
+        return sorted(self._index)
+
+
+_default_source = None
+_default_source_lock = threading.Lock()
+
+
+def open_meta_yml_source(location: str = None) -> MetaYmlSource:
+    """
+    Create the meta.yml source for a location.
+
+    Args:
+        location (str): A local nf-core/modules checkout, a tarball of it, or None to read from GitHub.
+
+    Returns:
+        MetaYmlSource: The meta.yml source.
+    """
+    if not location:
+        return GitHubMetaYmlSource()
+    if os.path.isdir(location):
+        return LocalMetaYmlSource(location)
+    return TarballMetaYmlSource(location)
+
+
+def get_meta_yml_source() -> MetaYmlSource:
+    """
+    Return the process-wide meta.yml source.
+
+    It is configured with the AGENTONTOLOGY_MODULES_DIR environment variable (a local nf-core/modules
+    checkout or tarball), and defaults to GitHub.
+
+    Returns:
+        MetaYmlSource: The meta.yml source.
+    """
+    global _default_source
+    if _default_source is None:
+        with _default_source_lock:
+            if _default_source is None:
+                _default_source = open_meta_yml_source(os.environ.get("AGENTONTOLOGY_MODULES_DIR"))
+    return _default_source
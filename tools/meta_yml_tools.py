@@ -1,10 +1,15 @@
-import requests
 import yaml
+from tools.meta_yml_sources import get_meta_yml_source
+from tools.meta_yml_writer import patch_meta_yml
+from tools.module_meta import ModuleMeta
 
 
 def get_meta_yml_file(module_name: str) -> dict:
     """
     Access the nf-core/modules repository and return the meta.yml file of the given module.
+
+    The file is read from the configured meta.yml source: a local nf-core/modules checkout or tarball
+    if the AGENTONTOLOGY_MODULES_DIR environment variable is set, GitHub otherwise.
     
     Args:
         module_name (str): The name of the module to get the meta.yml file for. 
@@ -14,25 +19,33 @@ def get_meta_yml_file(module_name: str) -> dict:
     Returns:
         dict: The meta.yml file of the given module in json/yaml format as a dictionary.
     """
-    if "_" in module_name:
-        tool, subtool = module_name.split("_")
-    elif "/" in module_name:
-        tool, subtool = module_name.split("/")
-    elif " " in module_name:
-        tool, subtool = module_name.split(" ")
-    else:
-        tool, subtool = module_name, ""
-
-    if subtool != "":
-        url = f"https://raw.githubusercontent.com/nf-core/modules/refs/heads/master/modules/nf-core/{tool}/{subtool}/meta.yml"
-    else:
-        url = f"https://raw.githubusercontent.com/nf-core/modules/refs/heads/master/modules/nf-core/{tool}/meta.yml"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an error for bad status codes
-        return yaml.safe_load(response.text)
-    except requests.exceptions.RequestException as e:
-        raise RuntimeError(f"An error occurred while connecting to the URL: {url}. Error message: {e}")
+    return get_meta_yml_source().get(module_name)
+
+
+async def get_meta_yml_file_async(module_name: str) -> dict:
+    """
+    Asynchronous version of `get_meta_yml_file`.
+
+    Args:
+        module_name (str): The name of the module to get the meta.yml file for.
+
+    Returns:
+        dict: The meta.yml file of the given module as a dictionary.
+    """
+    return await get_meta_yml_source().get_async(module_name)
+
+
+async def get_meta_yml_text_async(module_name: str) -> str:
+    """
+    Return the raw meta.yml file of the given module, see `get_meta_yml_file`.
+
+    Args:
+        module_name (str): The name of the module to get the meta.yml file for.
+
+    Returns:
+        str: The content of the meta.yml file.
+    """
+    return await get_meta_yml_source().get_text_async(module_name)
 
 def extract_module_name_description(meta_file: dict) -> list:
     """
@@ -104,48 +117,54 @@ def extract_information_from_meta_json(meta_file: dict, tool_name: str) -> dict:
         print("Extracted metadata information from nf-core module meta.yml")
     return {"inputs": inputs, "outputs": outputs, "homepage": homepage_url, "documentation": documentation_rul, "bio_tools_id": bio_tools_id}
 
-def update_meta_yml(input_ontologies: dict, output_ontologies: dict, meta_yml:dict) -> dict:
+def update_meta_yml(input_ontologies: dict, output_ontologies: dict, meta_yml:dict, module_meta: ModuleMeta = None) -> dict:
     """
     Update the meta.yml file with the final obtained ontologies
     Args:
         input_ontologies (dict): The final ontologies for inputs. 
-                            The dictionary contains the name of the file as key and a list of ontologies as value.
+                            The dictionary contains the key of the file (see `FileElement.key`) as key and a list of ontologies as value.
         output_ontologies (dict): The final ontologies for outputs. 
-                            The dictionary contains the name of the file as key and a list of ontologies as value.
+                            The dictionary contains the key of the file (see `FileElement.key`) as key and a list of ontologies as value.
         meta_yml (dict): The original meta.yml file content to be modified
+        module_meta (ModuleMeta): The index of meta_yml, built if not given.
     Returns:
         (dict): The updated meta.yml file
     """
-    # Format ontology links
-    def format_ontology_links(ontology_dict):
-        for key in ontology_dict.keys():
-            updated_list = []
-            # ontology_dict[key] should be a list of format terms like ["format_1234", "format_5678"]
-            for format_term in ontology_dict[key]:
-                updated_list.append({"edam": f"http://edamontology.org/{format_term}"})
-            ontology_dict[key] = updated_list
-        return ontology_dict
-    input_ontologies = format_ontology_links(input_ontologies)
-    output_ontologies = format_ontology_links(output_ontologies)
-
-    # inputs
-    for i, input_ch in enumerate(meta_yml["input"]):
-        for j, ch_element in enumerate(input_ch):
-            for key, value in ch_element.items():
-                if key in input_ontologies:
-                    try:
-                        meta_yml["input"][i][j][key]["ontologies"].append(input_ontologies[key])
-                    except KeyError:
-                        meta_yml["input"][i][j][key]["ontologies"] = input_ontologies[key]
-    # outputs
-    for i, output in enumerate(meta_yml["output"]):
-        for key, output_channel in output.items():
-            for j, out_element in enumerate(output_channel):
-                for element_name, value in out_element.items():
-                    if element_name in output_ontologies:
-                        try:
-                            meta_yml["output"][i][key][j][element_name]["ontologies"].append(output_ontologies[element_name])
-                        except KeyError:
-                            meta_yml["output"][i][key][j][element_name]["ontologies"] = output_ontologies[element_name]
-
-    return meta_yml
\ No newline at end of file
+    module_meta = module_meta or ModuleMeta(meta_yml)
+    ontologies = {"input": input_ontologies, "output": output_ontologies}
+    for element in module_meta.files:
+        format_terms = ontologies[element.direction].get(element.key)
+        if format_terms is None:
+            continue
+        # The element attributes are the dictionaries of meta_yml, updated in place. An empty `ontologies:` key is None
+        existing = element.attributes.get("ontologies") or []
+        element.attributes["ontologies"] = existing
+        for format_term in format_terms:
+            link = {"edam": f"http://edamontology.org/{format_term}"}
+            if link not in existing:
+                existing.append(link)
+
+    return meta_yml
+
+def update_meta_yml_text(input_ontologies: dict, output_ontologies: dict, meta_yml_text: str, module_meta: ModuleMeta = None) -> str:
+    """
+    Add the final obtained ontologies to a meta.yml file, preserving its formatting.
+
+    Only the `ontologies:` entries are modified (see `patch_meta_yml`). Files that cannot be patched in place
+    are parsed, updated with `update_meta_yml` and dumped again.
+
+    Args:
+        input_ontologies (dict): The final ontologies for inputs, as lists of format ids keyed by file key.
+        output_ontologies (dict): The final ontologies for outputs, as lists of format ids keyed by file key.
+        meta_yml_text (str): The original meta.yml file content.
+        module_meta (ModuleMeta): The index of the parsed meta_yml_text, built if not given.
+
+    Returns:
+        str: The updated meta.yml file content.
+    """
+    module_meta = module_meta or ModuleMeta(yaml.safe_load(meta_yml_text))
+    try:
+        return patch_meta_yml(meta_yml_text, module_meta.annotations(input_ontologies, output_ontologies))
+    except ValueError:
+        meta_yml = update_meta_yml(input_ontologies, output_ontologies, yaml.safe_load(meta_yml_text))
+        return yaml.dump(meta_yml)
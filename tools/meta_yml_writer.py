@@ -0,0 +1,149 @@
+"""
+Round-trip writer of nf-core meta.yml files.
+
+Instead of dumping the parsed content again, the ontologies are inserted into the original text,
+so comments, key order, quoting and block scalars are preserved and the change is limited to the
+`ontologies:` entries of the annotated files.
+"""
+import difflib
+import yaml
+
+EDAM_URI = "http://edamontology.org/"
+
+
+def _mapping_get(node: yaml.MappingNode, key: str):
+    for key_node, value_node in node.value:
+        if isinstance(key_node, yaml.ScalarNode) and key_node.value == key:
+            return key_node, value_node
+    return None, None
+
+
+def _node_at(root: yaml.Node, path: tuple):
+    """Follow a path of keys and indices (see `FileElement.path`) in a node tree."""
+    node = root
+    for step in path:
+        if isinstance(step, int):
+            if not isinstance(node, yaml.SequenceNode) or step >= len(node.value):
+                return None
+            node = node.value[step]
+        else:
+            if not isinstance(node, yaml.MappingNode):
+                return None
+            _, node = _mapping_get(node, step)
+    return node
+
+
+def _line_end(text: str, index: int) -> int:
+    """Index of the start of the line following `index`."""
+    newline = text.find("\n", index)
+    return len(text) if newline == -1 else newline + 1
+
+
+def _edam_uris(node) -> set:
+    uris = set()
+    if isinstance(node, yaml.SequenceNode):
+        for item in node.value:
+            if isinstance(item, yaml.MappingNode):
+                _, uri = _mapping_get(item, "edam")
+                if isinstance(uri, yaml.ScalarNode):
+                    uris.add(uri.value)
+    return uris
+
+
+def _ontology_lines(uris: list[str], indent: int, newline: str = "\n") -> str:
+    return "".join(f'{" " * indent}- edam: "{uri}"{newline}' for uri in uris)
+
+
+def patch_meta_yml(text: str, annotations: list[tuple]) -> str:
+    """
+    Add ontologies to the file elements of a meta.yml file, modifying only the `ontologies:` entries.
+
+    Elements without `ontologies` get a new block list after their last key. Existing lists keep their entries
+    and get the missing ones appended. Everything else in the file is left byte for byte unchanged,
+    and the inserted lines end like the lines of the file (CRLF or LF).
+
+    Args:
+        text (str): The original meta.yml file content.
+        annotations (list): (path, format ids) tuples, the path leading to the element metadata,
+            e.g. (("input", 0, 1, "reads"), ["format_1930"]). See `ModuleMeta.annotations`.
+
+    Returns:
+        str: The updated meta.yml file content.
+
+    Raises:
+        ValueError: If an element to annotate is missing, or written in flow style (e.g. `{type: file}`) which cannot be patched in place.
+    """
+    root = yaml.compose(text)
+    if not isinstance(root, yaml.MappingNode):
+        return text
+
+    newline = "\r\n" if "\r\n" in text else "\n"
+    # (start, end, replacement) edits on the original text, applied from the end
+    edits = []
+    for path, format_terms in annotations:
+        element = _node_at(root, path)
+        if not isinstance(element, yaml.MappingNode):
+            raise ValueError(f"No element at {'/'.join(map(str, path))}")
+        if element.flow_style:
+            raise ValueError(f"Cannot add ontologies to the flow style mapping at line {element.start_mark.line + 1}")
+        key_node, ontologies = _mapping_get(element, "ontologies")
+        uris = [f"{EDAM_URI}{term}" for term in dict.fromkeys(format_terms)]
+
+        if key_node is None:
+            if not uris:
+                continue
+            # New key after the last value of the element, at the indentation of its keys
+            indent = element.value[0][0].start_mark.column
+            last_value = element.value[-1][1]
+            end = last_value.end_mark
+            # Block scalars end at the start of the next line, other values on their own line (maybe before a comment)
+            position = end.index if end.column == 0 else _line_end(text, end.index)
+            prefix = "" if position == 0 or text[position - 1] == "\n" else newline
+            edits.append((position, position, f"{prefix}{' ' * indent}ontologies:{newline}{_ontology_lines(uris, indent + 2, newline)}"))
+            continue
+
+        existing = _edam_uris(ontologies)
+        missing = [uri for uri in uris if uri not in existing]
+        if not missing:
+            continue
+        if isinstance(ontologies, yaml.SequenceNode) and not ontologies.flow_style and ontologies.value:
+            # Append to the block list, after its last item
+            indent = ontologies.start_mark.column
+            end = ontologies.end_mark
+            position = end.index if end.column == 0 else _line_end(text, end.index)
+            prefix = "" if position == 0 or text[position - 1] == "\n" else newline
+            edits.append((position, position, f"{prefix}{_ontology_lines(missing, indent, newline)}"))
+        elif (isinstance(ontologies, yaml.ScalarNode) and ontologies.tag == "tag:yaml.org,2002:null") or (isinstance(ontologies, yaml.SequenceNode) and not ontologies.value):
+            # Empty value (e.g. `ontologies: []`): replaced by a block list, keeping a comment on the same line
+            indent = key_node.start_mark.column
+            value_start = text.index(":", key_node.end_mark.index) + 1
+            value_end = value_start if isinstance(ontologies, yaml.ScalarNode) and ontologies.value == "" else ontologies.end_mark.index
+            position = _line_end(text, value_end)
+            comment = text[value_end:position].rstrip()
+            edits.append((value_start, position, f"{comment}{newline}{_ontology_lines(missing, indent + 2, newline)}"))
+        else:
+            raise ValueError(f"Cannot add ontologies to the flow style list at line {ontologies.start_mark.line + 1}")
+
+    for start, end, replacement in sorted(edits, key=lambda edit: edit[0], reverse=True):
+        text = text[:start] + replacement + text[end:]
+    return text
+
+
+def meta_yml_diff(original: str, patched: str, path: str = "meta.yml") -> str:
+    """
+    Return the unified diff between two versions of a meta.yml file.
+
+    Args:
+        original (str): The original file content.
+        patched (str): The updated file content.
+        path (str): The path of the file in the repository, used in the diff header (e.g. "modules/nf-core/fastqc/meta.yml").
+
+    Returns:
+        str: The diff, applicable with `git apply` from the repository root, or an empty string if nothing changed.
+    """
+    return "".join(difflib.unified_diff(
+        original.splitlines(keepends=True),
+        patched.splitlines(keepends=True),
+        fromfile=f"a/{path}",
+        tofile=f"b/{path}",
+    ))
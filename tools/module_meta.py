@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class FileElement:
+    """
+    A file input or output of an nf-core module.
+
+    Attributes:
+        direction (str): "input" or "output".
+        channel (str): The output channel name, or the input name for inputs.
+        name (str): The element name, e.g. "reads" or "*.html".
+        key (str): The name identifying the element among the files of its direction: the input name, the output
+            channel name, or "<channel>/<name>" when an output channel has several files.
+        path (tuple): The keys and indices leading to the element metadata in the meta.yml content,
+            e.g. ("input", 0, 1, "reads") or ("output", 0, "html", 1, "*.html").
+        attributes (dict): The element metadata (type, description, pattern, ...), shared with the meta.yml content.
+    """
+    direction: str
+    channel: str
+    name: str
+    key: str
+    path: tuple
+    attributes: dict
+
+    @property
+    def description(self) -> str:
+        return self.attributes.get("description", "No description available")
+
+
+class ModuleMeta:
+    """
+    Index of the file inputs and outputs of a module meta.yml, built in a single pass.
+
+    The files are kept in meta.yml order, and can be looked up by (direction, key).
+    """
+
+    __slots__ = ("meta_yml", "files", "by_key")
+
+    def __init__(self, meta_yml: dict):
+        self.meta_yml = meta_yml
+        self.files = []
+        self.by_key = {}
+
+        for i, input_channel in enumerate(meta_yml.get("input") or []):
+            for j, ch_element in enumerate(input_channel):
+                for name, value in ch_element.items():
+                    if isinstance(value, dict) and value.get("type") == "file":
+                        self._add(FileElement("input", name, name, name, ("input", i, j, name), value))
+
+        for i, output in enumerate(meta_yml.get("output") or []):
+            for channel, output_channel in output.items():
+                channel_files = [
+                    (j, name, value)
+                    for j, out_element in enumerate(output_channel)
+                    for name, value in out_element.items()
+                    if isinstance(value, dict) and value.get("type") == "file" and name != "versions.yml"
+                ]
+                for j, name, value in channel_files:
+                    key = channel if len(channel_files) == 1 else f"{channel}/{name}"
+                    self._add(FileElement("output", channel, name, key, ("output", i, channel, j, name), value))
+
+    def _add(self, element: FileElement):
+        # Keys are unique per direction, even in malformed files repeating a name
+        key, n = element.key, 1
+        while (element.direction, key) in self.by_key:
+            n += 1
+            key = f"{element.key}#{n}"
+        element.key = key
+        self.files.append(element)
+        self.by_key[(element.direction, key)] = element
+
+    def get(self, direction: str, key: str) -> FileElement:
+        """
+        Return a file element.
+
+        Args:
+            direction (str): "input" or "output".
+            key (str): The element key, see `FileElement.key`.
+
+        Returns:
+            FileElement: The element, or None if the module has no such file.
+        """
+        return self.by_key.get((direction, key))
+
+    def annotations(self, input_ontologies: dict, output_ontologies: dict) -> list[tuple]:
+        """
+        Pair ontology results with the meta.yml paths of their elements.
+
+        Args:
+            input_ontologies (dict): Lists of format ids keyed by input element key.
+            output_ontologies (dict): Lists of format ids keyed by output element key.
+
+        Returns:
+            list: (path, format ids) tuples, in meta.yml order, for the elements with results.
+        """
+        ontologies = {"input": input_ontologies, "output": output_ontologies}
+        return [
+            (element.path, ontologies[element.direction][element.key])
+            for element in self.files
+            if element.key in ontologies[element.direction]
+        ]
@@ -0,0 +1,120 @@
+import json
+import os
+import re
+from typing import Callable
+from tools.edam_index import EdamTerm
+
+try:
+    import numpy as np
+except ImportError:  # Semantic search is optional
+    np = None
+
+
+def embedding_text(term: EdamTerm) -> str:
+    """
+    Build the text embedded for a term: its label, synonyms and definition.
+
+    Args:
+        term (EdamTerm): The EDAM term.
+
+    Returns:
+        str: The text to embed.
+    """
+    parts = [term.label]
+    if term.synonyms:
+        parts.append(", ".join(term.synonyms))
+    if term.definition:
+        parts.append(term.definition)
+    return ". ".join(parts)
+
+
+class SemanticIndex:
+    """
+    Dense vector index over EDAM terms, for queries that paraphrase a term instead of naming it
+    (e.g. "read alignments" for BAM).
+
+    Every term is embedded once. The normalized vectors are stored as a float32 NumPy matrix, which is
+    memory-mapped when loaded from disk, so a query is a single matrix-vector product (cosine similarity).
+    """
+
+    def __init__(self, ids: list[str], matrix):
+        self.ids = ids
+        self.matrix = matrix
+
+    @classmethod
+    def build(cls, terms: list[EdamTerm], embed: Callable[[list[str]], list[list[float]]], batch_size: int = 64) -> "SemanticIndex":
+        """
+        Embed the terms.
+
+        Args:
+            terms (list): The EDAM terms to index.
+            embed (callable): Function returning the embedding of each text of a list.
+            batch_size (int): Number of texts embedded per call.
+
+        Returns:
+            SemanticIndex: The index.
+        """
+        vectors = []
+        for start in range(0, len(terms), batch_size):
+            vectors.extend(embed([embedding_text(term) for term in terms[start:start + batch_size]]))
+        matrix = np.asarray(vectors, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        return cls([term.id for term in terms], matrix)
+
+    def save(self, path: str):
+        """
+        Save the index as <path> (the matrix, in .npy format) and <path>.ids.json.
+
+        Args:
+            path (str): The path of the matrix file.
+        """
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        ids_tmp_path = f"{path}.ids.json.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            np.save(fh, self.matrix)
+        with open(ids_tmp_path, "w") as fh:
+            json.dump(self.ids, fh)
+        # Both files are replaced atomically, the matrix last: its presence marks a complete index
+        os.replace(ids_tmp_path, f"{path}.ids.json")
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SemanticIndex":
+        """
+        Load an index saved with `save`, memory-mapping the matrix.
+
+        Args:
+            path (str): The path of the matrix file.
+
+        Returns:
+            SemanticIndex: The index.
+        """
+        with open(f"{path}.ids.json") as fh:
+            ids = json.load(fh)
+        return cls(ids, np.load(path, mmap_mode="r"))
+
+    def search(self, query_vector, top_k: int = 10) -> list[tuple[str, float]]:
+        """
+        Return the terms closest to a query embedding.
+
+        Args:
+            query_vector: The embedding of the query.
+            top_k (int): The maximum number of results.
+
+        Returns:
+            list: (term id, cosine similarity) tuples, best first.
+        """
+        query = np.asarray(query_vector, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+        scores = self.matrix @ query
+        top_k = min(top_k, len(self.ids))
+        if top_k <= 0:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [(self.ids[i], round(float(scores[i]), 3)) for i in best]
+
+
+def embedding_model_slug(model_id: str) -> str:
+    """Turn an embedding model id into a string usable in a file name ("ollama/nomic-embed-text" -> "ollama_nomic-embed-text")."""
+    return re.sub(r"[^A-Za-z0-9.-]+", "_", model_id)